@@ -0,0 +1,453 @@
+"""Read-only in-memory apartment catalog with vectorized filtering."""
+import hashlib
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from api import catalog_snapshot, database, metrics
+from api.database import row_to_dict
+
+# How often (seconds) to check whether an import changed the catalog
+GENERATION_CHECK_INTERVAL = 5.0
+
+# Stored in integer columns where SQLite has NULL
+MISSING = -1
+
+# Filter combinations whose match counts are remembered per catalog
+COUNT_CACHE_SIZE = 1024
+
+# Rows examined in the first step of a keyset page scan
+PAGE_SCAN_CHUNK = 4096
+
+logger = logging.getLogger(__name__)
+
+
+class ApartmentCatalog:
+    """
+    Columnar snapshot of the apartments table.
+
+    Numeric columns live in NumPy arrays ordered by id, and borough and
+    neighborhood are stored as small integer codes, so filters and counts are
+    vectorized masks instead of SQL. Each apartment's JSON is rendered to
+    bytes once, both the full record and the public one (without rent and
+    image_ids), so responses are built by joining cached fragments. SQLite
+    stays the source of truth; a catalog is never modified, only replaced
+    when the catalog generation changes.
+
+    The arrays and JSON sequences can be ordinary in-memory objects (`load`)
+    or views of a memory-mapped snapshot file shared by every worker process
+    (see api.catalog_snapshot).
+    """
+
+    # Numeric columns: (name, dtype, stored in place of NULL)
+    COLUMNS = (
+        ("id", np.int64, MISSING),
+        ("rent", np.int64, MISSING),
+        ("sqft", np.int32, MISSING),
+        ("bedrooms", np.int16, MISSING),
+        ("bathrooms", np.float32, np.nan),
+        ("year_built", np.int16, MISSING),
+        ("listing_id", np.int64, MISSING),
+        ("photo_count", np.int16, MISSING),
+    )
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        full_json: Sequence[bytes],
+        public_json: Sequence[bytes],
+        boroughs: List[str],
+        neighborhoods: List[str],
+        generation: int = 0,
+        updated_at: Optional[str] = None,
+    ):
+        self.generation = generation
+        self.updated_at = updated_at
+        self._counts: Dict[Tuple, int] = {}
+
+        self.full_json = full_json
+        self.public_json = public_json
+
+        self.boroughs = boroughs
+        self.neighborhoods = neighborhoods
+        self.borough_codes = {name: i for i, name in enumerate(self.boroughs)}
+        self.neighborhood_codes = {
+            name: i for i, name in enumerate(self.neighborhoods)
+        }
+
+        self.id = columns["id"]
+        self.rent = columns["rent"]
+        self.sqft = columns["sqft"]
+        self.bedrooms = columns["bedrooms"]
+        self.bathrooms = columns["bathrooms"]
+        self.year_built = columns["year_built"]
+        self.listing_id = columns["listing_id"]
+        self.photo_count = columns["photo_count"]
+        self.borough = columns["borough"]
+        self.neighborhood = columns["neighborhood"]
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: List[sqlite3.Row],
+        generation: int = 0,
+        updated_at: Optional[str] = None,
+    ) -> "ApartmentCatalog":
+        """Build a catalog from apartments rows ordered by id."""
+        n = len(rows)
+
+        full_json: List[bytes] = []
+        public_json: List[bytes] = []
+        for row in rows:
+            data = row_to_dict(row)
+            data.pop("content_hash", None)  # Import bookkeeping
+            full_json.append(orjson.dumps(data))
+            data.pop("rent")  # Don't expose the answer
+            data.pop("image_ids", None)  # Frontend builds URLs from id + photo_count
+            public_json.append(orjson.dumps(data))
+
+        def column(name: str, dtype, missing) -> np.ndarray:
+            values = (missing if r[name] is None else r[name] for r in rows)
+            return np.fromiter(values, dtype=dtype, count=n)
+
+        columns = {name: column(name, dtype, missing) for name, dtype, missing in cls.COLUMNS}
+
+        boroughs = sorted({r["borough"] for r in rows})
+        neighborhoods = sorted({r["neighborhood"] for r in rows})
+        borough_codes = {name: i for i, name in enumerate(boroughs)}
+        neighborhood_codes = {name: i for i, name in enumerate(neighborhoods)}
+        columns["borough"] = np.fromiter(
+            (borough_codes[r["borough"]] for r in rows), dtype=np.int16, count=n
+        )
+        columns["neighborhood"] = np.fromiter(
+            (neighborhood_codes[r["neighborhood"]] for r in rows),
+            dtype=np.int32,
+            count=n,
+        )
+        return cls(
+            columns, full_json, public_json, boroughs, neighborhoods, generation, updated_at
+        )
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "ApartmentCatalog":
+        """Read the whole apartments table into a new catalog."""
+        generation, updated_at = catalog_snapshot.source_version(conn)
+        rows = conn.execute(
+            """
+            SELECT * FROM apartments
+            ORDER BY id  -- plan: full-scan (loads the whole catalog)
+        """
+        ).fetchall()
+        return cls.from_rows(rows, generation, updated_at)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: catalog_snapshot.Snapshot) -> "ApartmentCatalog":
+        """A catalog whose arrays and JSON are views of a mapped snapshot."""
+        return cls(
+            snapshot.columns,
+            snapshot.full_json,
+            snapshot.public_json,
+            snapshot.boroughs,
+            snapshot.neighborhoods,
+            snapshot.generation,
+            snapshot.updated_at,
+        )
+
+    @property
+    def version(self) -> str:
+        """
+        Generation plus a hash of catalog_meta.updated_at, for ETags.
+
+        A database rebuilt from scratch can reach the same generation again
+        with different data; the timestamp keeps the two apart.
+        """
+        stamp = hashlib.blake2b((self.updated_at or "").encode(), digest_size=4)
+        return f"{self.generation}.{stamp.hexdigest()}"
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def position(self, apartment_id: int) -> Optional[int]:
+        """Index of `apartment_id` in the columns, or None if not present."""
+        if not MISSING < apartment_id <= np.iinfo(np.int64).max:
+            return None
+        pos = int(np.searchsorted(self.id, apartment_id))
+        if pos < len(self.id) and self.id[pos] == apartment_id:
+            return pos
+        return None
+
+    def rents(self, apartment_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized rent lookup: (rents, found) for each id in the array.
+
+        Rents for ids that aren't in the catalog are meaningless; check
+        `found` first.
+        """
+        if len(self) == 0:
+            return (
+                np.zeros(len(apartment_ids), dtype=np.int64),
+                np.zeros(len(apartment_ids), dtype=bool),
+            )
+        pos = np.minimum(np.searchsorted(self.id, apartment_ids), len(self) - 1)
+        return self.rent[pos], self.id[pos] == apartment_ids
+
+    def get(self, apartment_id: int) -> Optional[bytes]:
+        """Full apartment JSON (including rent), or None."""
+        pos = self.position(apartment_id)
+        return None if pos is None else self.full_json[pos]
+
+    def filter_mask(
+        self,
+        borough: Optional[str] = None,
+        neighborhood: Optional[str] = None,
+        min_bedrooms: Optional[int] = None,
+        max_bedrooms: Optional[int] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> np.ndarray:
+        """Boolean mask of apartments in positions [start, stop) matching
+        every given filter."""
+        stop = len(self) if stop is None else stop
+        rows = slice(start, stop)
+        size = max(0, stop - start)
+        mask = np.ones(size, dtype=bool)
+
+        if borough:
+            code = self.borough_codes.get(borough)
+            if code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= self.borough[rows] == code
+
+        if neighborhood:
+            code = self.neighborhood_codes.get(neighborhood)
+            if code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= self.neighborhood[rows] == code
+
+        if min_bedrooms is not None:
+            mask &= self.bedrooms[rows] >= min_bedrooms
+
+        if max_bedrooms is not None:
+            mask &= self.bedrooms[rows] <= max_bedrooms
+
+        return mask
+
+    def count(self, **filters) -> int:
+        """Number of apartments matching the filters, cached per combination.
+
+        The cache lives on this catalog, so an import (which swaps in a new
+        catalog) invalidates it.
+        """
+        key = tuple(sorted(filters.items()))
+        total = self._counts.get(key)
+        metrics.record_cache("catalog_count", total is not None)
+        if total is None:
+            if len(self._counts) >= COUNT_CACHE_SIZE:
+                self._counts.clear()
+            total = self._counts[key] = int(self.filter_mask(**filters).sum())
+        return total
+
+    def query(
+        self, skip: int = 0, limit: int = 50, **filters
+    ) -> Tuple[List[bytes], Optional[int]]:
+        """Offset pagination: one page of matching full JSON records (by id),
+        plus the id to continue after (None on the last page)."""
+        positions = np.flatnonzero(self.filter_mask(**filters))
+        page = positions[skip : skip + limit]
+        next_after = int(self.id[page[-1]]) if skip + limit < len(positions) else None
+        return [self.full_json[pos] for pos in page], next_after
+
+    def page_after(
+        self, after_id: Optional[int] = None, limit: int = 50, **filters
+    ) -> Tuple[List[bytes], Optional[int]]:
+        """
+        Keyset pagination: the first `limit` matching records with an id
+        greater than `after_id`, plus the id to continue after (None on the
+        last page).
+
+        Scans forward from the cursor in growing chunks, so the cost depends
+        on the page size and filter selectivity, not on how deep the page is.
+        """
+        start = 0
+        if after_id is not None:
+            start = int(np.searchsorted(self.id, after_id, side="right"))
+
+        # One extra match tells us whether there is a next page
+        wanted = limit + 1
+        positions: List[int] = []
+        chunk = PAGE_SCAN_CHUNK
+        while start < len(self) and len(positions) < wanted:
+            stop = min(start + chunk, len(self))
+            hits = np.flatnonzero(self.filter_mask(start=start, stop=stop, **filters))
+            positions.extend((hits[: wanted - len(positions)] + start).tolist())
+            start = stop
+            chunk *= 2  # Sparse filters need wider scans
+
+        has_more = len(positions) > limit
+        positions = positions[:limit]
+        next_after = int(self.id[positions[-1]]) if has_more else None
+        return [self.full_json[pos] for pos in positions], next_after
+
+    def sample(self, count: int) -> List[int]:
+        """Positions of up to `count` distinct random apartments, drawn in
+        O(count). Use them to index `public_json`, `id` and `rent`."""
+        return random.sample(range(len(self)), min(count, len(self)))
+
+    def sample_distinct_neighborhoods(self, count: int) -> List[int]:
+        """Like `sample`, but no two apartments share a neighborhood while
+        there are neighborhoods left to draw from.
+
+        Draws a few times `count` positions in one pass and keeps the first
+        per neighborhood; only a catalog dominated by a handful of
+        neighborhoods needs the O(n) fallback.
+        """
+        n = len(self)
+        count = min(count, n)
+        chosen: List[int] = []
+        seen = set()
+
+        def take(positions) -> None:
+            for pos in positions:
+                code = self.neighborhood[pos]
+                if code not in seen:
+                    seen.add(code)
+                    chosen.append(int(pos))
+                    if len(chosen) == count:
+                        return
+
+        take(random.sample(range(n), min(n, count * 4)))
+        if len(chosen) < count:
+            remaining = np.flatnonzero(~np.isin(self.neighborhood, list(seen)))
+            take(np.random.permutation(remaining))
+        if len(chosen) < count:
+            # Fewer neighborhoods than apartments asked for: repeat some
+            taken = set(chosen)
+            extra = (pos for pos in random.sample(range(n), n) if pos not in taken)
+            chosen.extend(next(extra) for _ in range(count - len(chosen)))
+        return chosen
+
+
+class CatalogStore:
+    """
+    Holds the current catalog and swaps in a new one after an import.
+
+    With snapshots enabled (the default), catalogs come from the database's
+    snapshot file when it matches the current generation. The first process
+    to find it missing or stale rebuilds it under a file lock while the
+    others wait, then every process maps the same file.
+
+    Only the first load (and a forced refresh) happens in the caller. After
+    an import the new catalog is loaded in a background thread, and requests
+    keep getting the previous one until it is swapped in.
+    """
+
+    def __init__(self, check_interval: float = GENERATION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._catalog: Optional[ApartmentCatalog] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._reloading: Optional[threading.Thread] = None
+
+    def refresh(self, force: bool = False) -> ApartmentCatalog:
+        """Reload the catalog if catalog_meta in SQLite has moved on."""
+        with self._lock:
+            # Another thread may have just refreshed while we waited
+            if (
+                not force
+                and self._catalog is not None
+                and time.monotonic() - self._checked_at < self.check_interval
+            ):
+                return self._catalog
+
+            with database.pool.connection() as conn:
+                if force or self._catalog is None:
+                    self._catalog = self._load(conn)
+                elif catalog_snapshot.source_version(conn) != (
+                    self._catalog.generation,
+                    self._catalog.updated_at,
+                ):
+                    self._reload_in_background()
+            self._checked_at = time.monotonic()
+            return self._catalog
+
+    def _reload_in_background(self) -> None:
+        """Start loading the new catalog unless a reload is already running."""
+        if self._reloading is not None and self._reloading.is_alive():
+            return
+        self._reloading = threading.Thread(
+            target=self._reload, name="catalog-reload", daemon=True
+        )
+        self._reloading.start()
+
+    def _reload(self) -> None:
+        try:
+            with database.pool.connection() as conn:
+                catalog = self._load(conn)
+        except Exception:
+            # The old catalog stays; the next check tries again
+            logger.exception("Couldn't reload the apartment catalog")
+            return
+        with self._lock:
+            self._catalog = catalog
+        logger.info(
+            "Swapped in catalog generation %d (%d apartments)",
+            catalog.generation,
+            len(catalog),
+        )
+
+    def _load(self, conn: sqlite3.Connection) -> ApartmentCatalog:
+        if not catalog_snapshot.ENABLED:
+            return ApartmentCatalog.load(conn)
+
+        path = catalog_snapshot.snapshot_path(database.pool.path)
+        catalog = self._open_snapshot(path, catalog_snapshot.source_version(conn))
+        if catalog is not None:
+            return catalog
+
+        with catalog_snapshot.build_lock(path):
+            # One read transaction, so the rows match the recorded version
+            conn.execute("BEGIN")
+            try:
+                version = catalog_snapshot.source_version(conn)
+                # Another process may have built it while we waited
+                catalog = self._open_snapshot(path, version)
+                if catalog is not None:
+                    return catalog
+                catalog = ApartmentCatalog.load(conn)
+            finally:
+                conn.rollback()
+            try:
+                catalog_snapshot.write(path, catalog, version[1])
+            except OSError as e:
+                logger.warning("Couldn't write catalog snapshot %s: %s", path, e)
+                return catalog
+
+        return self._open_snapshot(path, version) or catalog
+
+    @staticmethod
+    def _open_snapshot(path, version) -> Optional[ApartmentCatalog]:
+        snapshot = catalog_snapshot.read(path)
+        if snapshot is None or (snapshot.generation, snapshot.updated_at) != version:
+            return None
+        return ApartmentCatalog.from_snapshot(snapshot)
+
+    def current(self) -> ApartmentCatalog:
+        """The current catalog, checking for a newer generation at most every
+        `check_interval` seconds."""
+        catalog = self._catalog
+        if catalog is None or time.monotonic() - self._checked_at >= self.check_interval:
+            catalog = self.refresh()
+        return catalog
+
+
+catalog_store = CatalogStore()
+
+
+def get_catalog() -> ApartmentCatalog:
+    """FastAPI dependency returning the current apartment catalog."""
+    return catalog_store.current()
@@ -0,0 +1,245 @@
+"""
+Catalog snapshot: the apartment catalog in one file every worker maps.
+
+Layout of apartments.catalog (next to apartments.db):
+    8-byte magic, u32 header length, JSON header
+    numeric and code columns, each 64-byte aligned
+    heap: every apartment's full JSON, then every public JSON, back to back
+
+The header records the catalog generation and catalog_meta.updated_at the
+snapshot was built from, the borough and neighborhood names behind the
+codes, and where each column starts. `full_offsets` and `public_offsets`
+(n + 1 entries each) index the heap.
+
+Workers open the file with mmap and wrap it in NumPy arrays and lazy JSON
+sequences, so the catalog costs each process almost nothing beyond the
+shared page cache, and startup doesn't read the apartments table. A snapshot
+is never modified: a new generation is written to a temporary file and
+renamed over the old one, and processes still holding the old map keep
+reading it until they swap.
+
+    python -m api.catalog_snapshot   # (re)build; db/import_data.py runs it
+"""
+import argparse
+import json
+import mmap
+import os
+import sqlite3
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, rebuilds may overlap
+    fcntl = None
+
+MAGIC = b"SGCATSNP"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sI")  # magic, header length
+ALIGN = 64
+
+# Set CATALOG_SNAPSHOT=0 to always build the catalog in process memory
+ENABLED = os.getenv("CATALOG_SNAPSHOT", "1").lower() not in ("0", "false", "no")
+
+
+def snapshot_path(db_path: Path) -> Path:
+    """Snapshot belonging to a database: apartments.db -> apartments.catalog."""
+    return Path(db_path).with_suffix(".catalog")
+
+
+def source_version(conn: sqlite3.Connection) -> Tuple[int, Optional[str]]:
+    """(generation, updated_at) of catalog_meta, which a snapshot must match.
+
+    The timestamp tells apart databases that were rebuilt from scratch and
+    reached the same generation again.
+    """
+    try:
+        row = conn.execute(
+            "SELECT generation, updated_at FROM catalog_meta WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0, None
+    return (row[0], row[1]) if row else (0, None)
+
+
+class JSONHeap(Sequence[bytes]):
+    """The JSON records of a snapshot, sliced out of the map on access."""
+
+    def __init__(self, buffer: mmap.mmap, base: int, offsets: np.ndarray):
+        self._buffer = buffer
+        self._base = base
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+        start, stop = int(self._offsets[pos]), int(self._offsets[pos + 1])
+        return self._buffer[self._base + start : self._base + stop]
+
+
+class Snapshot(NamedTuple):
+    generation: int
+    updated_at: Optional[str]
+    columns: Dict[str, np.ndarray]
+    full_json: JSONHeap
+    public_json: JSONHeap
+    boroughs: List[str]
+    neighborhoods: List[str]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _offsets(records: Sequence[bytes]) -> np.ndarray:
+    offsets = np.zeros(len(records) + 1, dtype=np.uint64)
+    np.cumsum([len(r) for r in records], out=offsets[1:])
+    return offsets
+
+
+def write(path: Path, catalog, updated_at: Optional[str]) -> None:
+    """Write `catalog` (an ApartmentCatalog) to `path` atomically."""
+    columns = {name: getattr(catalog, name) for name, *_ in catalog.COLUMNS}
+    columns["borough"] = catalog.borough
+    columns["neighborhood"] = catalog.neighborhood
+    columns["full_offsets"] = _offsets(catalog.full_json)
+    columns["public_offsets"] = _offsets(catalog.public_json)
+
+    # Offsets in the header are relative to the aligned end of the header
+    layout = {}
+    offset = 0
+    for name, array in columns.items():
+        layout[name] = [array.dtype.str, offset, len(array)]
+        offset = _aligned(offset + array.nbytes)
+    heap_offset = offset
+    public_base = int(columns["full_offsets"][-1])
+
+    header = json.dumps(
+        {
+            "version": VERSION,
+            "generation": catalog.generation,
+            "updated_at": updated_at,
+            "count": len(catalog.id),
+            "boroughs": catalog.boroughs,
+            "neighborhoods": catalog.neighborhoods,
+            "columns": layout,
+            "heap": [heap_offset, public_base],
+        }
+    ).encode()
+    data_start = _aligned(PREAMBLE.size + len(header))
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, array in columns.items():
+            f.seek(data_start + layout[name][1])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.seek(data_start + heap_offset)
+        for record in catalog.full_json:
+            f.write(record)
+        for record in catalog.public_json:
+            f.write(record)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def build_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock held while (re)building the snapshot at `path`."""
+    if fcntl is None:
+        yield
+        return
+    with open(path.with_name(path.name + ".lock"), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read(path: Path) -> Optional[Snapshot]:
+    """Map a snapshot read-only, or None if there is no usable one."""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None  # missing or empty
+    if len(buffer) < PREAMBLE.size:
+        return None
+    magic, header_length = PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        return None
+    header = json.loads(buffer[PREAMBLE.size : PREAMBLE.size + header_length])
+    if header["version"] != VERSION:
+        return None
+    data_start = _aligned(PREAMBLE.size + header_length)
+
+    columns = {
+        name: np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + offset)
+        for name, (dtype, offset, count) in header["columns"].items()
+    }
+    heap_offset, public_base = header["heap"]
+    heap = data_start + heap_offset
+    return Snapshot(
+        generation=header["generation"],
+        updated_at=header["updated_at"],
+        columns=columns,
+        full_json=JSONHeap(buffer, heap, columns.pop("full_offsets")),
+        public_json=JSONHeap(buffer, heap + public_base, columns.pop("public_offsets")),
+        boroughs=header["boroughs"],
+        neighborhoods=header["neighborhoods"],
+    )
+
+
+def build(db_path: Path, path: Optional[Path] = None) -> Tuple[Path, int, int]:
+    """(Re)build the snapshot of the database at `db_path`.
+
+    Returns (path, apartments, generation).
+    """
+    from api.catalog import ApartmentCatalog
+
+    path = path or snapshot_path(db_path)
+    with build_lock(path):
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            # One read transaction, so the rows match the recorded version
+            conn.execute("BEGIN")
+            _, updated_at = source_version(conn)
+            catalog = ApartmentCatalog.load(conn)
+        finally:
+            conn.close()
+        write(path, catalog, updated_at)
+    return path, len(catalog), catalog.generation
+
+
+def main():
+    from api import database
+
+    parser = argparse.ArgumentParser(description="Build the catalog snapshot")
+    parser.add_argument("--db", type=Path, default=database.DB_PATH)
+    parser.add_argument("--out", type=Path, help="default: <db>.catalog")
+    args = parser.parse_args()
+
+    path, count, generation = build(args.db, args.out)
+    print(
+        f"✓ Wrote {count} apartments (generation {generation}) "
+        f"to {path} ({path.stat().st_size / 1e6:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""gzip/brotli response compression with a cache of precompressed bodies.
+
+Responses that carry an ETag (see api.http_cache) are compressed once per
+URL, version and encoding and then served from a bounded LRU; responses
+without one are compressed per request at a cheaper level. Brotli is used
+when the optional `brotli` package is installed.
+"""
+import gzip
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import anyio.to_thread
+
+from api import metrics
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies smaller than this aren't worth the header and CPU
+MINIMUM_SIZE = 500
+
+# Compressed bytes kept for versioned responses
+CACHE_BYTES = 32 * 1024 * 1024
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/")
+
+# (level for per-request compression, level for cached bodies): cached
+# bodies are compressed once, so they can afford the slower setting
+GZIP_LEVELS = (6, 9)
+BROTLI_QUALITIES = (4, 9)
+
+# Per-request compression of bodies at least this big runs in a worker
+# thread instead of on the event loop (cached bodies always do)
+OFFLOAD_SIZE = 64 * 1024
+
+# ETags of compressed representations get the encoding appended, since a
+# strong ETag must differ per byte-for-byte representation
+ETAG_SUFFIX = re.compile(rb'-(?:br|gzip)"')
+
+ENCODING_TOKEN = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Supported encoding the client prefers (highest q; br on a tie)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        match = ENCODING_TOKEN.fullmatch(part)
+        if not match:
+            continue
+        try:
+            q = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        accepted[match[1].lower()] = q
+
+    available = (["br"] if brotli is not None else []) + ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    q, encoding = max((accepted.get(e, wildcard), -i) for i, e in enumerate(available))
+    return available[-encoding] if q > 0 else None
+
+
+def compress(body: bytes, encoding: str, cached: bool) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITIES[cached])
+    return gzip.compress(body, compresslevel=GZIP_LEVELS[cached], mtime=0)
+
+
+class CompressedCache:
+    """Bounded LRU of compressed bodies keyed by (url, etag, encoding)."""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+        metrics.record_cache("compressed", body is not None)
+        return body
+
+    def put(self, key: Tuple, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON and text responses.
+
+    Only single-message bodies are compressed (every JSON route here sends
+    one); streamed and already-encoded responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE, cache: Optional[CompressedCache] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache or CompressedCache()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        # Clients revalidate with the suffixed ETag they were sent; routes
+        # compare against the plain one. The headers are rewritten in place
+        # so outer middleware still sees what the router adds to the scope.
+        if_none_match = headers.get(b"if-none-match")
+        revalidating_encoded = bool(if_none_match and ETAG_SUFFIX.search(if_none_match))
+        if revalidating_encoded:
+            scope["headers"] = [
+                (k, ETAG_SUFFIX.sub(b'"', v) if k == b"if-none-match" else v)
+                for k, v in scope["headers"]
+            ]
+
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if start["status"] == 304:
+                # Same validators as the 200 the client is revalidating. A
+                # 304 rarely has a Content-Type, but a suffixed ETag means
+                # that 200 was compressed (and so carried Vary)
+                if revalidating_encoded and encoding is not None:
+                    start = self._suffix_etag(start, encoding)
+                if revalidating_encoded or self._compressible(start):
+                    start = self._add_vary(start)
+                await send(start)
+                await send(message)
+                return
+
+            compressible = self._compressible(start)
+            if (
+                not compressible
+                or encoding is None
+                or message.get("more_body", False)
+                or start["status"] != 200
+                or len(body) < self.minimum_size
+            ):
+                if compressible:
+                    start = self._add_vary(start)
+                await send(start)
+                await send(message)
+                return
+
+            compressed = await self._body(scope, start, body, encoding)
+            await send(self._compressed_start(start, encoding, compressed))
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
+
+    @staticmethod
+    def _compressible(start) -> bool:
+        """JSON or text that isn't already encoded."""
+        content_type = b""
+        for key, value in start.get("headers", []):
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _etag(start) -> Optional[bytes]:
+        for key, value in start.get("headers", []):
+            if key.lower() == b"etag":
+                return value
+        return None
+
+    async def _body(self, scope, start, body: bytes, encoding: str) -> bytes:
+        etag = self._etag(start)
+        if etag is None:
+            if len(body) < OFFLOAD_SIZE:
+                return compress(body, encoding, False)
+            return await anyio.to_thread.run_sync(compress, body, encoding, False)
+        key = (scope["path"], scope.get("query_string", b""), etag, encoding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = await anyio.to_thread.run_sync(compress, body, encoding, True)
+            self.cache.put(key, compressed)
+        return compressed
+
+    @classmethod
+    def _compressed_start(cls, start, encoding: str, body: bytes):
+        headers = [
+            (k, v)
+            for k, v in cls._suffix_etag(start, encoding)["headers"]
+            if k.lower() != b"content-length"
+        ]
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+        return cls._add_vary({**start, "headers": headers})
+
+    @staticmethod
+    def _suffix_etag(start, encoding: str):
+        """`start` with its ETag marked as the `encoding` representation."""
+        headers = []
+        for key, value in start.get("headers", []):
+            if key.lower() == b"etag" and value.endswith(b'"'):
+                value = value[:-1] + b"-" + encoding.encode() + b'"'
+            headers.append((key, value))
+        return {**start, "headers": headers}
+
+    @staticmethod
+    def _add_vary(start):
+        headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"vary"]
+        vary = [v for k, v in start.get("headers", []) if k.lower() == b"vary"]
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+        return {**start, "headers": headers}
@@ -1,17 +1,163 @@
 """Database connection and utilities."""
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 import json
 
-DB_PATH = Path(__file__).parent.parent / "db" / "apartments.db"
+from api import metrics
 
+DB_PATH = Path(
+    os.getenv("DB_PATH", Path(__file__).parent.parent / "db" / "apartments.db")
+)
 
-def get_db():
-    """Get database connection."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Access columns by name
-    return conn
+# One connection per worker thread; matches anyio's default threadpool size,
+# which is what FastAPI runs sync routes and dependencies on
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "40"))
+
+# Prepared statements kept per connection (sqlite3's built-in LRU cache)
+STATEMENT_CACHE_SIZE = 256
+
+# Applied once when a connection is opened
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",  # readers don't block the writer
+    "PRAGMA synchronous = NORMAL",  # safe with WAL, one fsync per checkpoint
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",  # 16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+class ConnectionPool:
+    """
+    Pool of long-lived SQLite connections.
+
+    Connections are opened lazily up to `size` and handed out exclusively, so
+    a request keeps its connection even if FastAPI runs the dependency and the
+    route on different threads. Keeping connections open preserves their page
+    cache and prepared statement cache between requests.
+
+    A size of 0 disables pooling: every checkout opens a fresh connection and
+    checkin closes it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        size: int = POOL_SIZE,
+        statement_cache_size: int = STATEMENT_CACHE_SIZE,
+    ):
+        self.path = path
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Connections currently open and sitting idle."""
+        return {"open": self._opened, "idle": self._idle.qsize()}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            factory=metrics.InstrumentedConnection,
+        )
+        conn.row_factory = sqlite3.Row  # Access columns by name
+        # A plain cursor: connection setup isn't the request's query time,
+        # so it stays out of query metrics, Server-Timing and the slow log
+        setup = conn.cursor(sqlite3.Cursor)
+        for pragma in PRAGMAS:
+            setup.execute(pragma)
+        setup.close()
+        return conn
+
+    def acquire(self, timeout: Optional[float] = 30.0) -> sqlite3.Connection:
+        """Check out a connection, opening one if the pool isn't full yet."""
+        try:
+            conn = self._idle.get_nowait()
+            self.hits += 1
+            POOL_CHECKOUTS.inc("hit")
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self.size == 0 or self._opened < self.size
+            if can_open:
+                self._opened += 1
+
+        if can_open:
+            self.misses += 1
+            POOL_CHECKOUTS.inc("miss")
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        # Pool exhausted; wait for another request to give one back
+        conn = self._idle.get(timeout=timeout)
+        self.hits += 1
+        POOL_CHECKOUTS.inc("wait")
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool (or close it when not pooling)."""
+        if conn.in_transaction:
+            conn.rollback()
+
+        if self.size == 0:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+pool = ConnectionPool(DB_PATH)
+
+POOL_CHECKOUTS = metrics.Counter(
+    "db_pool_checkouts_total",
+    "Connection checkouts: idle reuse (hit), newly opened (miss), or after waiting.",
+    ("result",),
+)
+POOL_CONNECTIONS = metrics.Gauge(
+    "db_pool_connections",
+    "Pooled connections by state.",
+    lambda: {(state,): value for state, value in pool.stats().items()},
+    ("state",),
+)
 
 
 def row_to_dict(row: sqlite3.Row) -> dict:
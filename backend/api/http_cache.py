@@ -0,0 +1,57 @@
+"""ETags and Cache-Control for read endpoints.
+
+Every cacheable response is versioned by the data it was built from: the
+catalog version (generation and update time, both bumped by each import)
+for apartments, and the leaderboard cache version (which changes with every
+new score) for the leaderboard. Routes compare the version with
+`If-None-Match` before doing any other work and answer 304 when the client
+already has it.
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Bump when a response body changes shape, so clients drop old copies
+# even though the data version is the same
+RESPONSE_VERSION = 1
+
+# Catalog data only changes on import; give caches a minute before they
+# revalidate
+CATALOG_CACHE_CONTROL = "public, max-age=60"
+
+# Scores arrive continuously; a few seconds of sharing absorbs bursts of
+# identical reads without serving a stale board for long
+LEADERBOARD_CACHE_CONTROL = "public, max-age=5"
+
+# Random rounds must never be reused
+NO_STORE = "no-store"
+
+
+def etag(*parts) -> str:
+    """Strong ETag built from the versions a response depends on."""
+    return '"' + "-".join(str(p) for p in (f"v{RESPONSE_VERSION}", *parts)) + '"'
+
+
+def _matches(if_none_match: str, tag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any(c.removeprefix("W/") == tag for c in candidates)
+
+
+def not_modified(request: Request, tag: str, cache_control: str) -> Optional[Response]:
+    """A 304 response if the client already holds `tag`, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, tag):
+        return Response(
+            status_code=304, headers={"ETag": tag, "Cache-Control": cache_control}
+        )
+    return None
+
+
+def set_validators(response: Response, tag: str, cache_control: str) -> Response:
+    """Attach the ETag and Cache-Control to a full response."""
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,280 @@
+"""
+Packed photo store: a few large append-only blob files plus a sorted index.
+
+Layout under images/packs/:
+    pack-0000.blob, pack-0001.blob, ...   photo bytes, back to back
+    index.bin                             16-byte header, then fixed-width
+                                          records sorted by key
+
+A record maps (listing_id, photo index, width) to (pack, offset, length,
+hash); width 0 is the original and other widths are the derivatives from
+scripts/make_derivatives.py. The hash is the same BLAKE2b digest the file
+store uses for ETags, so a photo keeps its ETag when it moves into a pack.
+
+The server maps the packs and the index with mmap and serves photos as
+memoryview slices of the map: no per-photo file, stat or copy.
+
+    python -m api.image_pack pack     # add new photos under images/ to the packs
+    python -m api.image_pack verify   # check every record against its hash
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from api.images import IMAGES_DIR
+
+PACKS_DIR = IMAGES_DIR / "packs"
+
+MAGIC = b"SGPKIDX\0"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record count
+
+RECORD = np.dtype(
+    [
+        ("key", "<u8"),
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("pack", "<u2"),
+        ("flags", "<u2"),  # reserved
+        ("hash", "u1", (12,)),
+    ]
+)
+
+# A new pack file is started once the current one passes this size
+PACK_SIZE = 1 << 30
+
+# How often (seconds) servers look for a rewritten index
+RELOAD_INTERVAL = 5.0
+
+PHOTO_FILE = re.compile(r"(?:w(\d+)/)?(\d+)_(\d+)\.webp")
+
+
+def photo_key(listing_id: int, index: int, width: int = 0) -> int:
+    """Index key: listing id in the high 32 bits, then photo index and width."""
+    if not (0 <= listing_id < 1 << 32 and 0 <= index < 1 << 16 and 0 <= width < 1 << 16):
+        raise ValueError(f"Photo {listing_id}_{index} (w{width}) doesn't fit a pack key")
+    return listing_id << 32 | index << 16 | width
+
+
+def content_hash(data) -> bytes:
+    """Digest used for ETags by both the file store and the packs."""
+    return hashlib.blake2b(data, digest_size=12).digest()
+
+
+def pack_path(directory: Path, pack: int) -> Path:
+    return directory / f"pack-{pack:04d}.blob"
+
+
+def read_index(directory: Path) -> np.ndarray:
+    """Records of index.bin, sorted by key (empty if there is no index)."""
+    try:
+        raw = (directory / "index.bin").read_bytes()
+    except FileNotFoundError:
+        return np.zeros(0, dtype=RECORD)
+    magic, version, count = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{directory / 'index.bin'} is not a version {VERSION} pack index")
+    return np.frombuffer(raw, dtype=RECORD, count=count, offset=HEADER.size)
+
+
+def write_index(directory: Path, records: np.ndarray) -> None:
+    """Replace index.bin atomically."""
+    records = np.sort(records, order="key")
+    tmp = directory / "index.bin.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, directory / "index.bin")
+
+
+class ImagePack:
+    """A read-only view of the packs as of one index.bin."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.records = read_index(directory)
+        self.keys = self.records["key"]
+        self._maps: List[Optional[mmap.mmap]] = []
+        packs = int(self.records["pack"].max()) + 1 if len(self.records) else 0
+        for pack in range(packs):
+            try:
+                with open(pack_path(directory, pack), "rb") as f:
+                    self._maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            except (FileNotFoundError, ValueError):
+                self._maps.append(None)  # missing or empty pack
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _find(self, key: int) -> Optional[np.void]:
+        pos = int(np.searchsorted(self.keys, key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return self.records[pos]
+        return None
+
+    def get(self, listing_id: int, index: int, width: int = 0) -> Optional[Tuple[memoryview, str]]:
+        """(bytes as a memoryview into the map, ETag) of a photo, or None."""
+        try:
+            record = self._find(photo_key(listing_id, index, width))
+        except ValueError:
+            return None
+        if record is None:
+            return None
+        mapped = self._maps[record["pack"]]
+        offset, length = int(record["offset"]), int(record["length"])
+        if mapped is None or offset + length > len(mapped):
+            return None
+        etag = '"' + record["hash"].tobytes().hex() + '"'
+        return memoryview(mapped)[offset : offset + length], etag
+
+
+class PackStore:
+    """
+    The current ImagePack, re-opened when the packer rewrites index.bin.
+
+    Old maps are never closed explicitly: responses may still hold slices
+    of them, and they are released once the last slice is gone.
+    """
+
+    def __init__(self, directory: Path = PACKS_DIR, reload_interval: float = RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._pack: Optional[ImagePack] = None
+        self._index_version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[ImagePack]:
+        """The packs, or None if there is no index yet."""
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.reload_interval:
+                    self._reload()
+        return self._pack
+
+    def _reload(self) -> None:
+        self._checked_at = time.monotonic()
+        try:
+            st = os.stat(self.directory / "index.bin")
+        except FileNotFoundError:
+            self._pack, self._index_version = None, None
+            return
+        version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if version != self._index_version:
+            self._pack = ImagePack(self.directory)
+            self._index_version = version
+
+
+pack_store = PackStore()
+
+
+def photo_files(images_dir: Path) -> Iterator[Tuple[int, Path]]:
+    """(key, path) of every original and derivative under images_dir."""
+    for path in sorted(images_dir.glob("*.webp")) + sorted(images_dir.glob("w*/*.webp")):
+        match = PHOTO_FILE.fullmatch(path.relative_to(images_dir).as_posix())
+        if match:
+            width, listing_id, index = match.groups()
+            yield photo_key(int(listing_id), int(index), int(width or 0)), path
+
+
+def pack(images_dir: Path, directory: Path, pack_size: int = PACK_SIZE) -> None:
+    """Append photos that aren't packed yet and rewrite the index."""
+    directory.mkdir(parents=True, exist_ok=True)
+    existing = read_index(directory)
+    packed = set(existing["key"].tolist())
+
+    current = int(existing["pack"].max()) if len(existing) else 0
+    path = pack_path(directory, current)
+    offset = path.stat().st_size if path.exists() else 0
+
+    start_time = time.time()
+    added = []
+    added_bytes = 0
+    blob = open(path, "ab")
+    try:
+        for key, source in photo_files(images_dir):
+            if key in packed:
+                continue
+            data = source.read_bytes()
+            if offset and offset + len(data) > pack_size:
+                blob.close()
+                current += 1
+                blob = open(pack_path(directory, current), "ab")
+                offset = 0
+            blob.write(data)
+            record = np.zeros(1, dtype=RECORD)
+            record["key"], record["offset"], record["length"] = key, offset, len(data)
+            record["pack"] = current
+            record["hash"] = np.frombuffer(content_hash(data), dtype=np.uint8)
+            added.append(record)
+            packed.add(key)
+            offset += len(data)
+            added_bytes += len(data)
+        blob.flush()
+        os.fsync(blob.fileno())
+    finally:
+        blob.close()
+
+    if not added:
+        print(f"Nothing to pack ({len(existing)} photos already packed)")
+        return
+    # The index is written last, so a crash mid-pack only leaves unreferenced
+    # bytes at the end of a pack
+    write_index(directory, np.concatenate([existing, *added]))
+    elapsed = time.time() - start_time
+    print(
+        f"✓ Packed {len(added)} photos ({added_bytes / 1e6:.1f} MB) in {elapsed:.1f}s; "
+        f"{len(existing) + len(added)} photos in {current + 1} pack(s)"
+    )
+
+
+def verify(directory: Path) -> bool:
+    """Check every record's bounds and hash; print problems, return success."""
+    image_pack = ImagePack(directory)
+    bad = 0
+    for record in image_pack.records:
+        key = int(record["key"])
+        name = f"{key >> 32}_{key >> 16 & 0xFFFF} (w{key & 0xFFFF})"
+        mapped = image_pack._maps[record["pack"]]
+        offset, length = int(record["offset"]), int(record["length"])
+        if mapped is None or offset + length > len(mapped):
+            print(f"✗ {name}: outside pack {record['pack']}")
+            bad += 1
+        elif content_hash(memoryview(mapped)[offset : offset + length]) != record["hash"].tobytes():
+            print(f"✗ {name}: hash mismatch")
+            bad += 1
+    if len(np.unique(image_pack.keys)) != len(image_pack.keys):
+        print("✗ duplicate keys in index")
+        bad += 1
+    print(f"{len(image_pack) - bad}/{len(image_pack)} records OK")
+    return bad == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack listing photos into blob files")
+    parser.add_argument("command", choices=["pack", "verify"])
+    parser.add_argument("--images", type=Path, default=IMAGES_DIR)
+    parser.add_argument("--packs", type=Path, help="default: <images>/packs")
+    args = parser.parse_args()
+    directory = args.packs or args.images / "packs"
+
+    if args.command == "pack":
+        pack(args.images, directory)
+    elif not verify(directory):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Listing photo store: content-hash ETags and an in-memory LRU of hot images."""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from api import metrics
+
+IMAGES_DIR = Path(
+    os.getenv("IMAGES_DIR", Path(__file__).parent.parent / "images")
+)
+
+# Photos are written once by scripts/collect_imgs.py as {listing_id}_{i}.webp
+# and never modified, so anything else is a 404 (which also rules out paths).
+# scripts/make_derivatives.py writes narrower copies to w{width}/{name}.
+IMAGE_NAME = re.compile(r"(?:w\d+/)?\d+_\d+\.webp")
+
+# Widths make_derivatives.py produces; the originals are 1536px wide
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+
+# How long a missing file is remembered, so requests for derivatives that
+# haven't been generated yet don't each hit the filesystem
+MISSING_TTL = 60.0
+
+# Bytes of image data kept in memory, and the largest single file cached
+CACHE_BYTES = int(os.getenv("IMAGE_CACHE_MB", "64")) * 1024 * 1024
+MAX_CACHED_FILE = 1024 * 1024
+
+# Files whose size and hash are remembered, so a hit needs no stat()
+MAX_INDEXED = 100_000
+
+
+def variant(name: str, width: Optional[int]) -> str:
+    """Store key of a photo's derivative (or the original for None)."""
+    return f"w{width}/{name}" if width else name
+
+
+def widths_for(requested: Optional[int]) -> list:
+    """Derivative widths to try for a `?w=` request, best first: the smallest
+    at least as wide as requested, then wider ones. The original (None)
+    comes last."""
+    if requested is None:
+        return [None]
+    return [w for w in DERIVATIVE_WIDTHS if w >= requested] + [None]
+
+
+class ImageInfo(NamedTuple):
+    path: Path
+    stat: os.stat_result
+    etag: str
+
+
+class ImageStore:
+    """
+    Looks up photos under `directory`.
+
+    The first request for a file stats and hashes it; the result (and the
+    bytes, when the file is small enough) is kept in bounded LRU maps, so
+    repeat requests for hot images touch neither the filesystem nor the
+    disk. Files are assumed immutable once written.
+    """
+
+    def __init__(
+        self,
+        directory: Path = IMAGES_DIR,
+        cache_bytes: int = CACHE_BYTES,
+        max_cached_file: int = MAX_CACHED_FILE,
+        max_indexed: int = MAX_INDEXED,
+    ):
+        self.directory = directory
+        self.cache_bytes = cache_bytes
+        self.max_cached_file = max_cached_file
+        self.max_indexed = max_indexed
+        self._index: "OrderedDict[str, ImageInfo]" = OrderedDict()
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._data_bytes = 0
+        self._missing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def peek(self, name: str) -> Optional[ImageInfo]:
+        """An image's info if it is already indexed (no I/O)."""
+        with self._lock:
+            info = self._index.get(name)
+            if info is not None:
+                self._index.move_to_end(name)
+            return info
+
+    def info(self, name: str) -> Optional[ImageInfo]:
+        """Path, stat and ETag of an image, or None if there is no such file.
+        Reads and hashes the file the first time."""
+        info = self.peek(name)
+        if info is not None:
+            return info
+
+        if not IMAGE_NAME.fullmatch(name) or self._known_missing(name):
+            return None
+
+        path = self.directory / name
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            self._remember_missing(name)
+            return None
+
+        digest = hashlib.blake2b(data, digest_size=12).hexdigest()
+        info = ImageInfo(path, stat, f'"{digest}"')
+        with self._lock:
+            self._index[name] = info
+            if len(self._index) > self.max_indexed:
+                self._index.popitem(last=False)
+        self._store(name, data)
+        return info
+
+    def exists(self, name: str) -> bool:
+        """Whether the file is there, without reading or hashing it."""
+        if self.peek(name) is not None:
+            return True
+        if not IMAGE_NAME.fullmatch(name) or self._known_missing(name):
+            return False
+        if (self.directory / name).is_file():
+            return True
+        self._remember_missing(name)
+        return False
+
+    def _known_missing(self, name: str) -> bool:
+        missing_since = self._missing.get(name)
+        return missing_since is not None and time.monotonic() - missing_since < MISSING_TTL
+
+    def _remember_missing(self, name: str) -> None:
+        with self._lock:
+            if len(self._missing) >= self.max_indexed:
+                self._missing.clear()
+            self._missing[name] = time.monotonic()
+
+    def cached(self, name: str) -> Optional[bytes]:
+        """The image's bytes if they are in memory (no I/O)."""
+        with self._lock:
+            data = self._data.get(name)
+            if data is not None:
+                self._data.move_to_end(name)
+        metrics.record_cache("images", data is not None)
+        return data
+
+    def load(self, name: str, info: ImageInfo) -> Optional[bytes]:
+        """Read a small enough image into the cache and return its bytes;
+        None for files that should be streamed from disk instead."""
+        if info.stat.st_size > self.max_cached_file:
+            return None
+        data = info.path.read_bytes()
+        self._store(name, data)
+        return data
+
+    def _store(self, name: str, data: bytes) -> None:
+        if len(data) > min(self.max_cached_file, self.cache_bytes):
+            return
+        with self._lock:
+            if name in self._data:
+                return
+            self._data[name] = data
+            self._data_bytes += len(data)
+            while self._data_bytes > self.cache_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._data_bytes -= len(evicted)
+
+    def forget(self, name: str) -> None:
+        """Drop a file that has disappeared from disk."""
+        with self._lock:
+            self._index.pop(name, None)
+            data = self._data.pop(name, None)
+            if data is not None:
+                self._data_bytes -= len(data)
+
+
+image_store = ImageStore()
@@ -0,0 +1,263 @@
+"""In-memory top-N leaderboard, kept in sync with the leaderboard table."""
+import bisect
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from api import database
+
+# Largest `limit` GET /leaderboard accepts, so every read fits in the cache
+CAPACITY = 500
+
+# How often (seconds) to pick up rows written by other processes
+SYNC_INTERVAL = 1.0
+
+# Per-location boards kept in memory, most recently read first. Locations
+# are free text, so there's no bound on how many exist; the rest are read
+# from idx_leaderboard_location_ranking when asked for.
+MAX_LOCATION_BOARDS = 256
+
+ENTRY_COLUMNS = (
+    "id, player_name, location, total_score, rounds_played, average_score, created_at"
+)
+
+
+def entry_from_row(row: sqlite3.Row) -> dict:
+    """Leaderboard entry in the shape GET /leaderboard returns (minus rank)."""
+    return {
+        "id": row["id"],
+        "player_name": row["player_name"],
+        "location": row["location"],
+        "total_score": row["total_score"],
+        "rounds_played": row["rounds_played"],
+        "average_score": (
+            round(row["average_score"], 2) if row["average_score"] else 0
+        ),
+        "created_at": row["created_at"],
+    }
+
+
+def sort_key(entry: dict) -> Tuple:
+    """Same order as `ORDER BY total_score DESC, created_at ASC`."""
+    return (-entry["total_score"], entry["created_at"], entry["id"])
+
+
+class TopScores:
+    """The best `capacity` entries, kept sorted with bisect."""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._keys: List[Tuple] = []
+        self._entries: List[dict] = []
+        self._ids = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: dict) -> Optional[int]:
+        """Insert an entry; return its 1-based rank, or None if it didn't make
+        the cut. Adding an id that is already present is a no-op."""
+        if entry["id"] in self._ids:
+            return self._keys.index(sort_key(entry)) + 1
+
+        key = sort_key(entry)
+        if len(self._keys) >= self.capacity and key >= self._keys[-1]:
+            return None
+
+        pos = bisect.bisect_left(self._keys, key)
+        self._keys.insert(pos, key)
+        self._entries.insert(pos, entry)
+        self._ids.add(entry["id"])
+
+        if len(self._keys) > self.capacity:
+            self._keys.pop()
+            self._ids.discard(self._entries.pop()["id"])
+
+        return pos + 1
+
+    def top(self, limit: int) -> List[dict]:
+        """The best `limit` entries, with their rank."""
+        return [
+            {"rank": rank, **entry}
+            for rank, entry in enumerate(self._entries[:limit], start=1)
+        ]
+
+
+class LeaderboardCache:
+    """
+    Global and per-location top scores held in memory.
+
+    Loaded from SQLite at startup and updated by `submit_score` (write
+    through), so reads are O(limit) with no SQL. To stay correct when several
+    processes write, rows with an id above the last one seen are pulled in at
+    most every `sync_interval` seconds.
+
+    Only the `max_location_boards` most recently read locations have a board
+    (at startup, the ones with the most entries). A location without one is
+    loaded from SQLite on its first read, evicting the least recently read.
+
+    `version` identifies the set of rows the cache has seen, for ETags: the
+    last synced id plus the ids written through since. Processes that have
+    seen the same rows report the same version.
+    """
+
+    def __init__(
+        self,
+        capacity: int = CAPACITY,
+        sync_interval: float = SYNC_INTERVAL,
+        max_location_boards: int = MAX_LOCATION_BOARDS,
+    ):
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self.max_location_boards = max_location_boards
+        self._global = TopScores(capacity)
+        self._by_location: "OrderedDict[str, TopScores]" = OrderedDict()
+        self._last_id = 0
+        self._pending: set = set()  # written through, not yet synced
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _location_board(self, location: str) -> TopScores:
+        board = self._by_location.get(location)
+        if board is None:
+            board = self._by_location[location] = TopScores(self.capacity)
+            while len(self._by_location) > self.max_location_boards:
+                self._by_location.popitem(last=False)
+        return board
+
+    def _add(self, entry: dict) -> Optional[int]:
+        # Locations without a board are read from SQLite when next asked for
+        board = self._by_location.get(entry["location"])
+        if board is not None:
+            board.add(entry)
+        return self._global.add(entry)
+
+    def _load_location(self, location: str) -> TopScores:
+        """Board for a location that isn't cached, read from SQLite.
+
+        Called with the lock held, so no write-through for this location
+        can slip in between the query and the board going live.
+        """
+        with database.pool.connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {ENTRY_COLUMNS}
+                FROM leaderboard
+                WHERE location = ?
+                ORDER BY total_score DESC, created_at ASC
+                LIMIT ?
+            """,
+                (location, self.capacity),
+            ).fetchall()
+        if not rows:
+            # Not worth evicting a real board for (unknown locations included)
+            return TopScores(self.capacity)
+        board = self._location_board(location)
+        for row in rows:
+            board.add(entry_from_row(row))
+        return board
+
+    def load(self, conn: sqlite3.Connection) -> None:
+        """Replace the cache contents with the current top scores."""
+        global_rows = conn.execute(
+            f"""
+            SELECT {ENTRY_COLUMNS}
+            FROM leaderboard
+            ORDER BY total_score DESC, created_at ASC
+            LIMIT ?
+        """,
+            (self.capacity,),
+        ).fetchall()
+        location_rows = conn.execute(
+            f"""
+            SELECT {ENTRY_COLUMNS}
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY location
+                    ORDER BY total_score DESC, created_at ASC
+                ) AS location_rank
+                FROM leaderboard
+                WHERE location IN (
+                    SELECT location FROM leaderboard_location_counts
+                    ORDER BY count DESC, location
+                    LIMIT ?
+                )
+            )
+            WHERE location_rank <= ?
+        """,
+            (self.max_location_boards, self.capacity),
+        ).fetchall()
+        last_id = conn.execute("SELECT MAX(id) FROM leaderboard").fetchone()[0] or 0
+
+        with self._lock:
+            self._global = TopScores(self.capacity)
+            self._by_location = OrderedDict()
+            for row in location_rows:
+                self._location_board(row["location"]).add(entry_from_row(row))
+            for row in global_rows:
+                self._global.add(entry_from_row(row))
+            self._last_id = last_id
+            self._pending = set()
+            self._synced_at = time.monotonic()
+
+    def sync(self, conn: sqlite3.Connection) -> None:
+        """Pull in rows other processes inserted since the last sync."""
+        with self._lock:
+            rows = conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM leaderboard WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+            for row in rows:
+                self._add(entry_from_row(row))
+                self._last_id = row["id"]
+            self._pending = {i for i in self._pending if i > self._last_id}
+            self._synced_at = time.monotonic()
+
+    def maybe_sync(self) -> None:
+        """Sync if the last sync is older than `sync_interval`."""
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            with database.pool.connection() as conn:
+                self.sync(conn)
+
+    def add(self, entry: dict) -> Optional[int]:
+        """Record a newly inserted entry; return its global rank if it made
+        the top `capacity`."""
+        with self._lock:
+            if entry["id"] > self._last_id:
+                self._pending.add(entry["id"])
+            return self._add(entry)
+
+    @property
+    def version(self) -> str:
+        """Changes whenever a row is added; ids are never reused."""
+        with self._lock:
+            last_id = self._last_id
+            pending = ",".join(map(str, sorted(self._pending)))
+        if not pending:
+            return str(last_id)
+        digest = hashlib.blake2b(pending.encode(), digest_size=6).hexdigest()
+        return f"{last_id}.{digest}"
+
+    def top(self, limit: int, location: Optional[str] = None) -> List[dict]:
+        """The best `limit` entries overall or for one location."""
+        with self._lock:
+            if location:
+                board = self._by_location.get(location)
+                if board is None:
+                    board = self._load_location(location)
+                else:
+                    self._by_location.move_to_end(location)
+                return board.top(limit)
+            return self._global.top(limit)
+
+
+leaderboard_cache = LeaderboardCache()
+
+
+def get_leaderboard_cache() -> LeaderboardCache:
+    """FastAPI dependency returning the synced in-memory leaderboard."""
+    leaderboard_cache.maybe_sync()
+    return leaderboard_cache
@@ -1,21 +1,44 @@
 """FastAPI application for Streasy Guessr backend."""
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
-
-from api.routes import apartments, leaderboard
 
+# Load .env before importing modules that read settings at import time
 load_dotenv()
 
+from api import compression, database, metrics, tracing
+from api.responses import FastJSONResponse
+from api.catalog import catalog_store
+from api.leaderboard_cache import leaderboard_cache
+from api.score_writer import score_writer
+from api.routes import apartments, images, leaderboard, rounds
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks."""
+    catalog_store.refresh(force=True)
+    with database.pool.connection() as conn:
+        leaderboard_cache.load(conn)
+    score_writer.start()
+    yield
+    score_writer.stop()
+    database.pool.close()
+
+
 app = FastAPI(
     title="Streasy Guessr API",
     description="Backend API for the Streasy Guessr game",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Innermost, so compressed bodies are what the other middleware sees
+app.add_middleware(compression.CompressionMiddleware)
+
 # CORS middleware for Next.js frontend
 allowed_origins = os.getenv(
     "ALLOWED_ORIGINS",
@@ -30,13 +53,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if tracing.ENABLED:
+    app.add_middleware(tracing.TracingMiddleware)
+
+# Outermost, so latency includes CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(apartments.router, prefix="/api", tags=["apartments"])
 app.include_router(leaderboard.router, prefix="/api", tags=["leaderboard"])
-
-# Serve static images
-IMAGES_DIR = Path(__file__).parent.parent / "images"
-app.mount("/images", StaticFiles(directory=str(IMAGES_DIR)), name="images")
+app.include_router(rounds.router, prefix="/api", tags=["rounds"])
+app.include_router(images.router, tags=["images"])
 
 
 @app.get("/")
@@ -49,3 +76,11 @@ def root():
 def health():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request, query, pool and cache metrics."""
+    return Response(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,361 @@
+"""In-process metrics in the Prometheus text exposition format."""
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from api import tracing
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow requests
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """Base class: a named family of labelled series."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        return tuple(str(v) for v in labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterable[str]:
+        return ()
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """Point-in-time value, read from a callback when rendered."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labels: Sequence[str] = (),
+    ):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self.callback().items()):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets, with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.label_names, key, f'le="{le}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {repr(float(series[-1]))}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+REGISTRY: List[Metric] = []
+
+
+def render() -> str:
+    """Every registered metric in the text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# -- HTTP --------------------------------------------------------------------
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status.",
+    ("method", "route", "status"),
+)
+
+
+def route_template(scope) -> Optional[str]:
+    """
+    Template of the route that handled a request, as clients see it.
+
+    The router stores routes without the prefix they were included under
+    (`/apartments/{apartment_id}` for `/api/apartments/1`), so the prefix is
+    recovered from the request path: the part before the segment where the
+    route's own pattern starts matching.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    regex = getattr(route, "path_regex", None)
+    if not template or regex is None:
+        return template
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request into REQUEST_DURATION."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Use the route template so /apartments/1 and /apartments/2 share
+            # a series; unmatched paths are lumped together
+            path = route_template(scope) or "unmatched"
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start, scope["method"], path, str(status)
+            )
+
+
+# -- SQLite ------------------------------------------------------------------
+
+QUERY_DURATION = Histogram(
+    "sqlite_query_duration_seconds",
+    "Time spent executing and fetching each SQL statement.",
+    ("statement",),
+)
+QUERY_ROWS = Counter(
+    "sqlite_query_rows_total",
+    "Rows returned (or changed, for writes) by each SQL statement.",
+    ("statement",),
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_COMMENT = re.compile(r"--[^\n]*")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_MAX_STATEMENT_LENGTH = 200
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse a statement to a stable label: no comments, single spaces,
+    literals and IN-lists folded into placeholders."""
+    sql = _COMMENT.sub("", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    sql = _NUMBER.sub("?", sql)
+    return sql[:_MAX_STATEMENT_LENGTH]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that records each statement's time and row count.
+
+    SQLite produces rows lazily, so a statement's time covers execute() plus
+    every fetch until the next execute(), close() or the cursor being freed.
+    """
+
+    _statement: Optional[str] = None
+    _sql = ""
+    _parameters: Any = None
+    _elapsed = 0.0
+    _rows = 0
+
+    def _flush(self) -> None:
+        if self._statement is not None:
+            statement, self._statement = self._statement, None
+            rows = self._rows if self._rows or self.rowcount < 0 else self.rowcount
+            QUERY_DURATION.observe(self._elapsed, statement)
+            QUERY_ROWS.inc(statement, amount=rows)
+            if tracing.ENABLED or tracing.SLOW_QUERY_SECONDS is not None:
+                tracing.record(
+                    self.connection, self._sql, self._parameters,
+                    statement, self._elapsed, rows,
+                )
+
+    def _begin(self, sql: str, parameters: Any) -> None:
+        self._flush()
+        self._statement = normalize_sql(sql)
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, None)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        finally:
+            self._elapsed += time.perf_counter() - start
+        self._rows += 1
+        return row
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def __del__(self):
+        self._flush()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute's) are instrumented."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# -- Caches ------------------------------------------------------------------
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lookups in in-process caches, by cache and hit/miss.",
+    ("cache", "result"),
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count one cache lookup."""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
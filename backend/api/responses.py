@@ -0,0 +1,28 @@
+"""JSON responses that bypass FastAPI's jsonable_encoder."""
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+
+class FastJSONResponse(Response):
+    """
+    application/json rendered by orjson.
+
+    Routes return one of these (via `json_response`) instead of a dict, so
+    FastAPI neither walks the content with jsonable_encoder nor validates it
+    against the route's response_model; the response models only document
+    the shape. Content that is already encoded is sent as is.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def json_response(content: Any) -> Response:
+    """Send JSON bytes, or plain data (dicts, lists, str, int, float, None)."""
+    return FastJSONResponse(content)
@@ -0,0 +1,148 @@
+"""Encrypted round tokens carrying the answers for a game round."""
+import base64
+import binascii
+import logging
+import os
+import struct
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+logger = logging.getLogger(__name__)
+
+# Bump when the payload layout changes; old versions are rejected
+TOKEN_VERSION = 1
+
+# Tokens older than this (seconds) are rejected
+TOKEN_TTL = int(os.getenv("ROUND_TOKEN_TTL", str(24 * 60 * 60)))
+
+_HEADER = struct.Struct(">BB")  # version, key id
+_NONCE_SIZE = 12
+_PAYLOAD_HEADER = struct.Struct(">IB")  # issued_at, apartment count
+_APARTMENT = struct.Struct(">QI")  # apartment id, rent
+
+
+class RoundTokenError(Exception):
+    """Raised when a round token is malformed, forged, expired or unknown."""
+
+
+class UnknownKeyError(RoundTokenError):
+    """Raised when a token was sealed with a key this process doesn't hold.
+
+    Such a token may be genuine (issued by another worker, or before a
+    restart, when keys aren't configured), so callers fall back to looking
+    the rents up instead of rejecting the request.
+    """
+
+
+class RoundTokenCodec:
+    """
+    Issues and opens round tokens.
+
+    A token is `version | key id | nonce | AES-GCM(payload)`, base64url
+    encoded, with the version and key id authenticated as associated data.
+    The payload holds the issue time and the (apartment id, rent) pairs of
+    the round, so guesses can be scored without a database read while the
+    rent stays hidden from the client.
+
+    Keys are identified by a one-byte id. New tokens use the active key;
+    any configured key is accepted when opening, which allows rotation.
+    """
+
+    def __init__(
+        self,
+        keys: Dict[int, bytes],
+        active_key_id: int,
+        ttl: int = TOKEN_TTL,
+        ephemeral: bool = False,
+    ):
+        if active_key_id not in keys:
+            raise ValueError(f"Active key id {active_key_id} is not configured")
+        self._ciphers = {kid: AESGCM(key) for kid, key in keys.items()}
+        self.active_key_id = active_key_id
+        self.ttl = ttl
+        # A per-process random key: other processes seal tokens with the
+        # same key id but a different key
+        self.ephemeral = ephemeral
+
+    @classmethod
+    def from_env(cls) -> "RoundTokenCodec":
+        """
+        Build a codec from ROUND_TOKEN_KEYS.
+
+        Format: comma-separated `key_id:base64url_key` pairs (key ids 0-255,
+        keys 16/24/32 bytes). The first pair is the active key. Without the
+        variable a random key is generated, so tokens only open in this
+        process; tokens from other workers or before a restart raise
+        UnknownKeyError.
+        """
+        spec = os.getenv("ROUND_TOKEN_KEYS", "").strip()
+        if not spec:
+            logger.warning(
+                "ROUND_TOKEN_KEYS not set; using a random key for this process "
+                "(tokens from other workers are checked against the catalog)"
+            )
+            return cls({0: AESGCM.generate_key(bit_length=256)}, 0, ephemeral=True)
+
+        keys: Dict[int, bytes] = {}
+        active_key_id: Optional[int] = None
+        for pair in spec.split(","):
+            kid_str, _, key_b64 = pair.strip().partition(":")
+            kid = int(kid_str)
+            if not 0 <= kid <= 255:
+                raise ValueError(f"Round token key id out of range: {kid}")
+            keys[kid] = base64.urlsafe_b64decode(key_b64 + "=" * (-len(key_b64) % 4))
+            if active_key_id is None:
+                active_key_id = kid
+        return cls(keys, active_key_id)
+
+    def issue(self, apartments: Sequence[Tuple[int, int]]) -> str:
+        """Create a token for a round of (apartment id, rent) pairs."""
+        header = _HEADER.pack(TOKEN_VERSION, self.active_key_id)
+        payload = _PAYLOAD_HEADER.pack(int(time.time()), len(apartments)) + b"".join(
+            _APARTMENT.pack(apartment_id, rent) for apartment_id, rent in apartments
+        )
+        nonce = os.urandom(_NONCE_SIZE)
+        sealed = self._ciphers[self.active_key_id].encrypt(nonce, payload, header)
+        return base64.urlsafe_b64encode(header + nonce + sealed).rstrip(b"=").decode()
+
+    def open(self, token: str) -> Dict[int, int]:
+        """Verify and decrypt a token; return {apartment id: rent}."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (binascii.Error, ValueError):
+            raise RoundTokenError("Round token is not valid base64")
+
+        if len(raw) < _HEADER.size + _NONCE_SIZE:
+            raise RoundTokenError("Round token is truncated")
+
+        header = raw[: _HEADER.size]
+        version, kid = _HEADER.unpack(header)
+        if version != TOKEN_VERSION:
+            raise RoundTokenError(f"Unsupported round token version {version}")
+
+        cipher = self._ciphers.get(kid)
+        if cipher is None:
+            raise UnknownKeyError(f"Unknown round token key {kid}")
+
+        nonce = raw[_HEADER.size : _HEADER.size + _NONCE_SIZE]
+        try:
+            payload = cipher.decrypt(nonce, raw[_HEADER.size + _NONCE_SIZE :], header)
+        except InvalidTag:
+            if self.ephemeral:
+                raise UnknownKeyError("Round token was sealed by another process")
+            raise RoundTokenError("Round token failed authentication")
+
+        issued_at, count = _PAYLOAD_HEADER.unpack_from(payload)
+        if time.time() - issued_at > self.ttl:
+            raise RoundTokenError("Round token has expired")
+
+        return dict(
+            _APARTMENT.unpack_from(payload, _PAYLOAD_HEADER.size + i * _APARTMENT.size)
+            for i in range(count)
+        )
+
+
+codec = RoundTokenCodec.from_env()
@@ -1,85 +1,210 @@
 """Apartment API routes."""
 
-from fastapi import APIRouter, HTTPException, Query
+import base64
+import binascii
+import struct
+
+import numpy as np
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
 from typing import List, Optional
-import random
 
-from api.database import get_db, row_to_dict
+from api import http_cache
+from api.catalog import ApartmentCatalog, get_catalog
+from api.responses import json_response
+from api.round_tokens import RoundTokenError, UnknownKeyError, codec
 
 router = APIRouter()
 
+# Pagination cursors encode the last id of the previous page
+CURSOR = struct.Struct(">Q")
 
-@router.get("/apartments/random")
+
+class Guess(BaseModel):
+    """A single rent guess."""
+
+    apartment_id: int = Field(gt=0, lt=2**63)
+    # Bounded so scoring stays within int64 and the result serializes
+    guessed_rent: int = Field(ge=0, le=2**31 - 1)
+
+
+class GuessRequest(Guess):
+    """A single rent guess, optionally scored from a round token."""
+
+    round_token: Optional[str] = None
+
+
+class GuessBatch(BaseModel):
+    """Every guess of a game, validated in one request."""
+
+    guesses: List[Guess] = Field(min_length=1, max_length=20)
+    round_token: Optional[str] = None
+
+
+class Apartment(BaseModel):
+    """An apartment as games see it: no rent and no image_ids."""
+
+    id: int
+    listing_url: str
+    sqft: Optional[int] = None
+    bedrooms: int
+    bathrooms: float
+    neighborhood: str
+    borough: str
+    address: Optional[str] = None
+    floor: Optional[int] = None
+    home_features: Optional[List[str]] = None
+    amenities: Optional[List[str]] = None
+    year_built: Optional[int] = None
+    photo_count: int
+    listing_id: Optional[int] = None
+    property_id: Optional[int] = None
+    created_at: Optional[str] = None
+
+
+class ApartmentDetail(Apartment):
+    """The full record, rent included."""
+
+    rent: int
+    image_ids: List[str]
+
+
+class RandomApartments(BaseModel):
+    apartments: List[Apartment]
+    count: int
+    round_token: str
+
+
+class ApartmentPage(BaseModel):
+    apartments: List[ApartmentDetail]
+    total: int
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class GuessResult(BaseModel):
+    """Score of one guess; lower is better."""
+
+    apartment_id: int
+    guessed_rent: int
+    actual_rent: int
+    difference: int
+    percentage_off: float
+    score: float
+
+
+class GuessBatchResult(BaseModel):
+    results: List[GuessResult]
+    total_score: float
+    count: int
+
+
+def open_round_token(round_token: str) -> Optional[dict]:
+    """
+    Decrypt a round token into {apartment id: rent}, or fail with 400.
+
+    None for a token sealed with a key this process doesn't hold (another
+    worker's, or one from before a restart); callers then read the rents
+    from the catalog.
+    """
+    try:
+        return codec.open(round_token)
+    except UnknownKeyError:
+        return None
+    except RoundTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def encode_cursor(after_id: int) -> str:
+    """Opaque pagination cursor for "apartments with id > after_id"."""
+    return base64.urlsafe_b64encode(CURSOR.pack(after_id)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Inverse of encode_cursor, or fail with 400."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return CURSOR.unpack(raw)[0]
+    except (binascii.Error, ValueError, struct.error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/apartments/random", response_model=RandomApartments)
 def get_random_apartments(
     count: int = Query(
         5, ge=1, le=10, description="Number of random apartments to fetch"
-    )
+    ),
+    catalog: ApartmentCatalog = Depends(get_catalog),
 ):
     """
     Get random apartments for a game round.
 
     Returns apartments WITHOUT rent price (that's the answer!).
-    Frontend will use listing IDs to submit guesses.
+    Frontend will use listing IDs to submit guesses, along with the returned
+    round_token so the guesses can be scored without a database lookup.
     """
-    conn = get_db()
-    cursor = conn.cursor()
-
-    # Get total count
-    cursor.execute("SELECT COUNT(*) as total FROM apartments")
-    total = cursor.fetchone()["total"]
-
-    if total == 0:
+    if len(catalog) == 0:
         raise HTTPException(status_code=404, detail="No apartments in database")
 
-    # Get random apartments
-    # SQLite's RANDOM() is efficient for small-medium datasets
-    cursor.execute(
-        """
-        SELECT * FROM apartments
-        ORDER BY RANDOM()
-        LIMIT ?
-    """,
-        (count,),
-    )
-
-    apartments = [row_to_dict(row) for row in cursor.fetchall()]
-    conn.close()
+    positions = catalog.sample(count)
 
-    # Remove sensitive/unnecessary fields
-    for apt in apartments:
-        apt.pop("rent")  # Don't expose the answer
-        apt.pop("image_ids", None)  # Redundant - frontend constructs URLs from id + photo_count
+    # Public JSON is already without rent and image_ids; the rents travel
+    # encrypted in the round token instead
+    apartments = b",".join(catalog.public_json[pos] for pos in positions)
+    round_token = codec.issue(
+        [(int(catalog.id[pos]), int(catalog.rent[pos])) for pos in positions]
+    )
 
-    return {"apartments": apartments, "count": len(apartments)}
+    response = json_response(
+        b'{"apartments":[%b],"count":%d,"round_token":"%b"}'
+        % (apartments, len(positions), round_token.encode())
+    )
+    response.headers["Cache-Control"] = http_cache.NO_STORE
+    return response
 
 
-@router.get("/apartments/{apartment_id}")
-def get_apartment(apartment_id: int):
+@router.get("/apartments/{apartment_id}", response_model=ApartmentDetail)
+def get_apartment(
+    apartment_id: int,
+    request: Request,
+    catalog: ApartmentCatalog = Depends(get_catalog),
+):
     """Get a specific apartment by ID (includes rent)."""
-    conn = get_db()
-    cursor = conn.cursor()
+    tag = http_cache.etag("c", catalog.version)
+    cached = http_cache.not_modified(request, tag, http_cache.CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
 
-    cursor.execute("SELECT * FROM apartments WHERE id = ?", (apartment_id,))
-    row = cursor.fetchone()
-    conn.close()
+    apartment = catalog.get(apartment_id)
 
-    if not row:
+    if not apartment:
         raise HTTPException(status_code=404, detail="Apartment not found")
 
-    return row_to_dict(row)
+    return http_cache.set_validators(
+        json_response(apartment), tag, http_cache.CATALOG_CACHE_CONTROL
+    )
 
 
-@router.post("/apartments/validate-guess")
-def validate_guess(guess: dict):
+@router.post("/apartments/validate-guess", response_model=GuessResult)
+def validate_guess(
+    guess: GuessRequest, catalog: ApartmentCatalog = Depends(get_catalog)
+):
     """
     Validate a rent guess against the actual rent.
 
     Expected payload:
     {
         "apartment_id": 123,
-        "guessed_rent": 3500
+        "guessed_rent": 3500,
+        "round_token": "..."  // optional, from /apartments/random
     }
 
+    With a round token the rent is read from the token; without one (or with
+    one this process can't open) it comes from the catalog. Neither path
+    touches the database.
+
     Returns:
     {
         "apartment_id": 123,
@@ -90,25 +215,22 @@ def validate_guess(guess: dict):
         "score": 90 (calculated based on accuracy)
     }
     """
-    apartment_id = guess.get("apartment_id")
-    guessed_rent = guess.get("guessed_rent")
-
-    if not apartment_id or guessed_rent is None:
-        raise HTTPException(
-            status_code=400, detail="Missing apartment_id or guessed_rent"
-        )
-
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT rent FROM apartments WHERE id = ?", (apartment_id,))
-    row = cursor.fetchone()
-    conn.close()
-
-    if not row:
-        raise HTTPException(status_code=404, detail="Apartment not found")
+    apartment_id = guess.apartment_id
+    guessed_rent = guess.guessed_rent
+    rents = open_round_token(guess.round_token) if guess.round_token else None
+
+    if rents is not None:
+        actual_rent = rents.get(apartment_id)
+        if actual_rent is None:
+            raise HTTPException(
+                status_code=400, detail="Apartment is not part of this round"
+            )
+    else:
+        apartment = catalog.position(apartment_id)
+        if apartment is None:
+            raise HTTPException(status_code=404, detail="Apartment not found")
+        actual_rent = int(catalog.rent[apartment])
 
-    actual_rent = row["rent"]
     difference = abs(guessed_rent - actual_rent)
     percentage_off = (difference / actual_rent) * 100
 
@@ -119,79 +241,145 @@ def validate_guess(guess: dict):
     # Score is just the percentage error
     score = round(percentage_off, 2)
 
-    return {
-        "apartment_id": apartment_id,
-        "guessed_rent": guessed_rent,
-        "actual_rent": actual_rent,
-        "difference": difference,
-        "percentage_off": round(percentage_off, 2),
-        "score": score,
+    return json_response(
+        {
+            "apartment_id": apartment_id,
+            "guessed_rent": guessed_rent,
+            "actual_rent": actual_rent,
+            "difference": difference,
+            "percentage_off": round(percentage_off, 2),
+            "score": score,
+        }
+    )
+
+
+@router.post("/apartments/validate-guesses", response_model=GuessBatchResult)
+def validate_guesses(
+    batch: GuessBatch, catalog: ApartmentCatalog = Depends(get_catalog)
+):
+    """
+    Validate all the guesses of a game at once.
+
+    Expected payload:
+    {
+        "guesses": [
+            {"apartment_id": 123, "guessed_rent": 3500},
+            {"apartment_id": 456, "guessed_rent": 2800}
+        ],
+        "round_token": "..."  // optional, from /apartments/random
     }
 
+    Returns one result per guess (same shape as /apartments/validate-guess)
+    plus the summed score for the round.
+    """
+    apartment_ids = np.array([g.apartment_id for g in batch.guesses], dtype=np.int64)
+    guessed = np.array([g.guessed_rent for g in batch.guesses], dtype=np.int64)
+
+    rents = open_round_token(batch.round_token) if batch.round_token else None
+    if rents is not None:
+        missing = [g.apartment_id for g in batch.guesses if g.apartment_id not in rents]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Apartments not part of this round: {missing}",
+            )
+        actual = np.array(
+            [rents[g.apartment_id] for g in batch.guesses], dtype=np.int64
+        )
+    else:
+        actual, found = catalog.rents(apartment_ids)
+        if not found.all():
+            missing = apartment_ids[~found].tolist()
+            raise HTTPException(
+                status_code=404, detail=f"Apartments not found: {missing}"
+            )
+
+    # Same golf-style scoring as validate_guess, for every guess at once
+    difference = np.abs(guessed - actual)
+    percentage_off = np.round(difference / actual * 100, 2)
+
+    results = [
+        {
+            "apartment_id": apartment_id,
+            "guessed_rent": guessed_rent,
+            "actual_rent": actual_rent,
+            "difference": diff,
+            "percentage_off": pct,
+            "score": pct,
+        }
+        for apartment_id, guessed_rent, actual_rent, diff, pct in zip(
+            apartment_ids.tolist(),
+            guessed.tolist(),
+            actual.tolist(),
+            difference.tolist(),
+            percentage_off.tolist(),
+        )
+    ]
+
+    return json_response(
+        {
+            "results": results,
+            "total_score": round(float(percentage_off.sum()), 2),
+            "count": len(results),
+        }
+    )
+
 
-@router.get("/apartments")
+@router.get("/apartments", response_model=ApartmentPage)
 def list_apartments(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
     borough: Optional[str] = None,
     neighborhood: Optional[str] = None,
     min_bedrooms: Optional[int] = None,
     max_bedrooms: Optional[int] = None,
+    catalog: ApartmentCatalog = Depends(get_catalog),
 ):
     """
     List apartments with optional filters.
-    """
-    conn = get_db()
-    cursor = conn.cursor()
-
-    # Build query with filters
-    query = "SELECT * FROM apartments WHERE 1=1"
-    params = []
-
-    if borough:
-        query += " AND borough = ?"
-        params.append(borough)
-
-    if neighborhood:
-        query += " AND neighborhood = ?"
-        params.append(neighborhood)
-
-    if min_bedrooms is not None:
-        query += " AND bedrooms >= ?"
-        params.append(min_bedrooms)
-
-    if max_bedrooms is not None:
-        query += " AND bedrooms <= ?"
-        params.append(max_bedrooms)
-
-    query += " ORDER BY id LIMIT ? OFFSET ?"
-    params.extend([limit, skip])
 
-    cursor.execute(query, params)
-    apartments = [row_to_dict(row) for row in cursor.fetchall()]
-
-    # Get total count for pagination
-    count_query = "SELECT COUNT(*) as total FROM apartments WHERE 1=1"
-    count_params = []
-
-    if borough:
-        count_query += " AND borough = ?"
-        count_params.append(borough)
-
-    if neighborhood:
-        count_query += " AND neighborhood = ?"
-        count_params.append(neighborhood)
-
-    if min_bedrooms is not None:
-        count_query += " AND bedrooms >= ?"
-        count_params.append(min_bedrooms)
+    Pages by id: pass the returned next_cursor to get the following page (it
+    is null on the last page). Deep pages cost the same as the first one.
+    `skip` still works for offset paging but has to count the skipped rows;
+    it can't be combined with a cursor.
+    """
+    if skip and cursor is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either skip or cursor, not both"
+        )
 
-    if max_bedrooms is not None:
-        count_query += " AND bedrooms <= ?"
-        count_params.append(max_bedrooms)
+    tag = http_cache.etag("c", catalog.version)
+    cached = http_cache.not_modified(request, tag, http_cache.CATALOG_CACHE_CONTROL)
+    if cached:
+        return cached
 
-    cursor.execute(count_query, count_params)
-    total = cursor.fetchone()["total"]
-    conn.close()
+    filters = dict(
+        borough=borough,
+        neighborhood=neighborhood,
+        min_bedrooms=min_bedrooms,
+        max_bedrooms=max_bedrooms,
+    )
 
-    return {"apartments": apartments, "total": total, "skip": skip, "limit": limit}
+    if skip:
+        apartments, next_after = catalog.query(skip=skip, limit=limit, **filters)
+    else:
+        after_id = decode_cursor(cursor) if cursor is not None else None
+        apartments, next_after = catalog.page_after(after_id, limit, **filters)
+
+    next_cursor = encode_cursor(next_after) if next_after is not None else None
+
+    response = json_response(
+        b'{"apartments":[%b],"total":%d,"skip":%d,"limit":%d,"next_cursor":%b}'
+        % (
+            b",".join(apartments),
+            catalog.count(**filters),
+            skip,
+            limit,
+            orjson.dumps(next_cursor),
+        )
+    )
+    return http_cache.set_validators(response, tag, http_cache.CATALOG_CACHE_CONTROL)
@@ -0,0 +1,145 @@
+"""Listing photo routes."""
+
+import re
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from api import http_cache
+from api.image_pack import pack_store
+from api.images import image_store, variant, widths_for
+
+router = APIRouter()
+
+# A photo's name never points at different bytes, so caches may keep it
+# for a year without revalidating
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Sent when a wider image stands in for a derivative that hasn't been
+# generated yet, so clients pick up the right one once it exists
+FALLBACK_CACHE_CONTROL = "public, max-age=3600"
+
+SINGLE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+PHOTO_NAME = re.compile(r"(\d+)_(\d+)\.webp")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single-range `Range` header, or None to
+    send the whole file (multiple or malformed ranges). Unsatisfiable
+    ranges fail with 416.
+    """
+    match = SINGLE_RANGE.fullmatch(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+@router.api_route("/images/{name}", methods=["GET", "HEAD"])
+async def get_image(
+    name: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, description="Width the client will display"),
+):
+    """
+    Serve a listing photo ({listing_id}_{index}.webp).
+
+    With `w`, the smallest pre-generated derivative at least `w` pixels wide
+    is sent (see scripts/make_derivatives.py), falling back to wider ones and
+    finally the original.
+
+    Packed photos (see api.image_pack) are slices of a memory map. Loose
+    files come from an in-memory LRU without leaving the event loop when
+    hot; disk reads go to the threadpool, and files too large to cache are
+    handed to the server as a file (sent with pathsend where the ASGI
+    server supports it). Supports If-None-Match and single byte ranges.
+    """
+    match = PHOTO_NAME.fullmatch(name)
+    image_pack = pack_store.current() if match else None
+
+    widths = widths_for(w)
+    for width in widths:
+        if image_pack is not None:
+            packed = image_pack.get(int(match[1]), int(match[2]), width or 0)
+            if packed is not None:
+                data, etag = packed
+                return memory_response(request, data, etag, cache_control(width, widths))
+
+        key = variant(name, width)
+        info = image_store.peek(key) or await run_in_threadpool(image_store.info, key)
+        if info is not None:
+            break
+    else:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    control = cache_control(width, widths)
+    cached = http_cache.not_modified(request, info.etag, control)
+    if cached:
+        return cached
+
+    data = image_store.cached(key)
+    if data is None:
+        try:
+            data = await run_in_threadpool(image_store.load, key, info)
+        except FileNotFoundError:
+            image_store.forget(key)
+            raise HTTPException(status_code=404, detail="Image not found")
+
+    if data is None:
+        # FileResponse handles ranges, If-Range and HEAD itself; passing the
+        # known stat saves it a syscall
+        return FileResponse(
+            info.path,
+            media_type="image/webp",
+            headers={"ETag": info.etag, "Cache-Control": control, "Accept-Ranges": "bytes"},
+            stat_result=info.stat,
+        )
+
+    return memory_response(request, data, info.etag, control)
+
+
+def cache_control(width: Optional[int], widths: list) -> str:
+    """Immutable for the photo that was asked for, short-lived for a fallback."""
+    return IMAGE_CACHE_CONTROL if width == widths[0] else FALLBACK_CACHE_CONTROL
+
+
+def memory_response(request: Request, data, etag: str, control: str) -> Response:
+    """Send photo bytes (or a memoryview of them) that are already in memory."""
+    cached = http_cache.not_modified(request, etag, control)
+    if cached:
+        return cached
+
+    headers = {"ETag": etag, "Cache-Control": control, "Accept-Ranges": "bytes"}
+    size = len(data)
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if "range" in request.headers and (if_range is None or if_range == etag):
+        byte_range = parse_range(request.headers["range"], size)
+
+    status_code = 200
+    if byte_range is not None:
+        start, end = byte_range
+        data = data[start : end + 1]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status_code = 206
+
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(len(data))
+        data = b""
+    return Response(
+        content=data, status_code=status_code, media_type="image/webp", headers=headers
+    )
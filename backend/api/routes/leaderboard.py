@@ -1,10 +1,16 @@
 """Leaderboard API routes."""
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+import asyncio
+import sqlite3
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 from pydantic import BaseModel
 
-from api.database import get_db
+from api import database, http_cache
+from api.leaderboard_cache import LeaderboardCache, get_leaderboard_cache
+from api.responses import json_response
+from api.score_writer import score_writer
 
 router = APIRouter()
 
@@ -18,8 +24,50 @@ class LeaderboardEntry(BaseModel):
     rounds_played: int = 3
 
 
-@router.post("/leaderboard")
-def submit_score(entry: LeaderboardEntry):
+class SubmittedScore(BaseModel):
+    id: int
+    player_name: str
+    location: Optional[str] = None
+    total_score: int
+    rounds_played: int
+    average_score: float
+    rank: Optional[int] = None  # None if outside the cached top scores
+    message: str
+
+
+class RankedEntry(BaseModel):
+    """A leaderboard row as GET /leaderboard returns it."""
+
+    rank: int
+    id: int
+    player_name: str
+    location: Optional[str] = None
+    total_score: int
+    rounds_played: int
+    average_score: float
+    created_at: Optional[str] = None
+
+
+class Leaderboard(BaseModel):
+    leaderboard: List[RankedEntry]
+    total_entries: int
+    filtered_by_location: Optional[str] = None
+
+
+class LocationCount(BaseModel):
+    location: str
+    count: int
+
+
+class LeaderboardStats(BaseModel):
+    total_entries: int
+    highest_score: int
+    average_score: float
+    top_locations: List[LocationCount]
+
+
+@router.post("/leaderboard", response_model=SubmittedScore)
+async def submit_score(entry: LeaderboardEntry):
     """
     Submit a score to the leaderboard.
 
@@ -30,125 +78,122 @@ def submit_score(entry: LeaderboardEntry):
         "total_score": 450,
         "rounds_played": 5
     }
-    """
-    conn = get_db()
-    cursor = conn.cursor()
 
+    The insert is queued for the background score writer, which commits
+    submissions in groups; the response is sent once this row is committed.
+    """
     # Calculate average score
     average_score = (
         entry.total_score / entry.rounds_played if entry.rounds_played > 0 else 0
     )
 
-    cursor.execute(
-        """
-        INSERT INTO leaderboard (player_name, location, total_score, rounds_played, average_score)
-        VALUES (?, ?, ?, ?, ?)
-    """,
-        (
-            entry.player_name,
-            entry.location,
-            entry.total_score,
-            entry.rounds_played,
-            average_score,
-        ),
+    saved, rank = await asyncio.wrap_future(
+        score_writer.submit(
+            (
+                entry.player_name,
+                entry.location,
+                entry.total_score,
+                entry.rounds_played,
+                average_score,
+            )
+        )
     )
 
-    entry_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-
-    return {
-        "id": entry_id,
-        "player_name": entry.player_name,
-        "location": entry.location,
-        "total_score": entry.total_score,
-        "rounds_played": entry.rounds_played,
-        "average_score": round(average_score, 2),
-        "message": "Score submitted successfully!",
-    }
+    return json_response(
+        {
+            "id": saved["id"],
+            "player_name": entry.player_name,
+            "location": entry.location,
+            "total_score": entry.total_score,
+            "rounds_played": entry.rounds_played,
+            "average_score": round(average_score, 2),
+            "rank": rank,  # None if outside the top CAPACITY
+            "message": "Score submitted successfully!",
+        }
+    )
 
 
-@router.get("/leaderboard")
+@router.get("/leaderboard", response_model=Leaderboard)
 def get_leaderboard(
+    request: Request,
     limit: int = Query(100, ge=1, le=500, description="Number of entries to return"),
     location: Optional[str] = None,
+    cache: LeaderboardCache = Depends(get_leaderboard_cache),
 ):
     """
     Get top scores from the leaderboard.
 
     Returns entries sorted by total_score (highest first).
     Optionally filter by location.
+    Served from the in-memory leaderboard; no SQL on this path, except the
+    first read of a location that has no board in memory.
     """
-    conn = get_db()
-    cursor = conn.cursor()
+    tag = http_cache.etag("lb", cache.version)
+    cached = http_cache.not_modified(
+        request, tag, http_cache.LEADERBOARD_CACHE_CONTROL
+    )
+    if cached:
+        return cached
 
-    query = """
-        SELECT id, player_name, location, total_score, rounds_played, average_score, created_at
-        FROM leaderboard
-    """
-    params = []
-
-    if location:
-        query += " WHERE location = ?"
-        params.append(location)
-
-    query += " ORDER BY total_score DESC, created_at ASC LIMIT ?"
-    params.append(limit)
-
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-
-    entries = []
-    for idx, row in enumerate(rows, start=1):
-        entries.append(
-            {
-                "rank": idx,
-                "id": row["id"],
-                "player_name": row["player_name"],
-                "location": row["location"],
-                "total_score": row["total_score"],
-                "rounds_played": row["rounds_played"],
-                "average_score": (
-                    round(row["average_score"], 2) if row["average_score"] else 0
-                ),
-                "created_at": row["created_at"],
-            }
-        )
+    entries = cache.top(limit, location)
 
-    return {
-        "leaderboard": entries,
-        "total_entries": len(entries),
-        "filtered_by_location": location,
-    }
+    response = json_response(
+        {
+            "leaderboard": entries,
+            "total_entries": len(entries),
+            "filtered_by_location": location,
+        }
+    )
+    return http_cache.set_validators(
+        response, tag, http_cache.LEADERBOARD_CACHE_CONTROL
+    )
 
 
-@router.get("/leaderboard/stats")
-def get_leaderboard_stats():
-    """Get overall leaderboard statistics."""
-    conn = get_db()
-    cursor = conn.cursor()
+@router.get("/leaderboard/stats", response_model=LeaderboardStats)
+def get_leaderboard_stats(
+    request: Request,
+    cache: LeaderboardCache = Depends(get_leaderboard_cache),
+):
+    """
+    Get overall leaderboard statistics.
+
+    Reads the running aggregates that triggers maintain on every insert,
+    update and delete, instead of scanning the leaderboard. Versioned like
+    /leaderboard, so a matching If-None-Match is answered before a
+    connection is checked out.
+    """
+    tag = http_cache.etag("lb", cache.version)
+    cached = http_cache.not_modified(
+        request, tag, http_cache.LEADERBOARD_CACHE_CONTROL
+    )
+    if cached:
+        return cached
+
+    with database.pool.connection() as conn:
+        stats = leaderboard_stats(conn)
+    return http_cache.set_validators(
+        json_response(stats), tag, http_cache.LEADERBOARD_CACHE_CONTROL
+    )
 
-    # Total entries
-    cursor.execute("SELECT COUNT(*) as total FROM leaderboard")
-    total = cursor.fetchone()["total"]
 
-    # Highest score
-    cursor.execute("SELECT MAX(total_score) as max_score FROM leaderboard")
-    max_score = cursor.fetchone()["max_score"] or 0
+def leaderboard_stats(conn: sqlite3.Connection) -> dict:
+    """Totals and top locations from the trigger-maintained summary tables."""
+    cursor = conn.cursor()
 
-    # Average score across all players
-    cursor.execute("SELECT AVG(total_score) as avg_score FROM leaderboard")
-    avg_score = cursor.fetchone()["avg_score"] or 0
+    cursor.execute(
+        "SELECT total_entries, score_sum, max_score FROM leaderboard_stats WHERE id = 1"
+    )
+    stats = cursor.fetchone()
+    total = stats["total_entries"] if stats else 0
+    max_score = (stats["max_score"] if stats else None) or 0
+    avg_score = stats["score_sum"] / total if total else 0
 
     # Top locations (most submissions)
     cursor.execute(
         """
-        SELECT location, COUNT(*) as count
-        FROM leaderboard
-        WHERE location IS NOT NULL
-        GROUP BY location
-        ORDER BY count DESC
+        SELECT location, count
+        FROM leaderboard_location_counts
+        ORDER BY count DESC, location
         LIMIT 10
     """
     )
@@ -157,8 +202,6 @@ def get_leaderboard_stats():
         for row in cursor.fetchall()
     ]
 
-    conn.close()
-
     return {
         "total_entries": total,
         "highest_score": max_score,
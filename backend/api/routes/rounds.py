@@ -0,0 +1,83 @@
+"""Game round API routes."""
+
+from typing import List
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from api import http_cache
+from api.catalog import ApartmentCatalog, get_catalog
+from api.image_pack import pack_store
+from api.images import image_store
+from api.responses import json_response
+from api.round_tokens import codec
+from api.routes.apartments import Apartment
+
+router = APIRouter()
+
+# scripts/collect_imgs.py downloads at most this many photos per listing
+MAX_PHOTOS = 5
+
+
+class RoundApartment(Apartment):
+    images: List[str]
+
+
+class NewGame(BaseModel):
+    rounds: List[RoundApartment]
+    count: int
+    round_token: str
+
+
+def photo_urls(listing_id: int, photo_count: int) -> List[str]:
+    """URLs of the listing's photos that are actually on the server."""
+    if listing_id < 0:
+        return []  # Listing without a StreetEasy id; no photos were downloaded
+    image_pack = pack_store.current()
+    urls = []
+    for index in range(min(photo_count, MAX_PHOTOS)):
+        name = f"{listing_id}_{index}.webp"
+        if (
+            image_pack is not None and image_pack.get(listing_id, index) is not None
+        ) or image_store.exists(name):
+            urls.append(f"/images/{name}")
+    return urls
+
+
+@router.get("/rounds/new", response_model=NewGame)
+def new_game(
+    rounds: int = Query(5, ge=1, le=10, description="Number of rounds in the game"),
+    catalog: ApartmentCatalog = Depends(get_catalog),
+):
+    """
+    Everything a game needs in one call.
+
+    Returns `rounds` apartments (without rent) from different neighborhoods,
+    each with `images`: the photo URLs that exist on the server, relative to
+    the API host. `round_token` covers every apartment of the game and is
+    accepted by /apartments/validate-guess and /apartments/validate-guesses.
+    """
+    if len(catalog) == 0:
+        raise HTTPException(status_code=404, detail="No apartments in database")
+
+    positions = catalog.sample_distinct_neighborhoods(rounds)
+
+    apartments = []
+    for pos in positions:
+        images = photo_urls(int(catalog.listing_id[pos]), int(catalog.photo_count[pos]))
+        # Splice the photo list into the pre-rendered public JSON object
+        apartments.append(
+            catalog.public_json[pos][:-1] + b',"images":' + orjson.dumps(images) + b"}"
+        )
+
+    round_token = codec.issue(
+        [(int(catalog.id[pos]), int(catalog.rent[pos])) for pos in positions]
+    )
+
+    response = json_response(
+        b'{"rounds":[%b],"count":%d,"round_token":"%b"}'
+        % (b",".join(apartments), len(positions), round_token.encode())
+    )
+    response.headers["Cache-Control"] = http_cache.NO_STORE
+    return response
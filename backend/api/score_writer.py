@@ -0,0 +1,145 @@
+"""Write-behind batching for leaderboard submissions."""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from api import database
+from api.leaderboard_cache import ENTRY_COLUMNS, entry_from_row, leaderboard_cache
+
+logger = logging.getLogger(__name__)
+
+# Most rows committed in one transaction
+MAX_BATCH = 100
+# Extra time (seconds) to wait for more rows before committing. With 0 a
+# group is whatever queued up while the previous commit was running, which
+# batches well under load without delaying lone submissions.
+MAX_DELAY = 0.0
+
+INSERT_SQL = f"""
+    INSERT INTO leaderboard (player_name, location, total_score, rounds_played, average_score)
+    VALUES (?, ?, ?, ?, ?)
+    RETURNING {ENTRY_COLUMNS}
+"""
+
+# (player_name, location, total_score, rounds_played, average_score)
+ScoreParams = Tuple[str, Optional[str], int, int, float]
+
+
+class ScoreWriter:
+    """
+    Background thread that commits leaderboard inserts in group transactions.
+
+    Every SQLite commit is a sync to disk and takes the database's single
+    write lock, so committing each submission separately serializes bursts.
+    Submissions are queued instead, and the writer inserts everything queued
+    (up to `max_batch` rows, optionally lingering `max_delay` for more) in
+    one transaction. Each caller gets a future that resolves to (entry, rank)
+    once its row is committed and added to the in-memory leaderboard.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Optional[Tuple[ScoreParams, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the writer thread if it isn't running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="score-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def submit(self, params: ScoreParams) -> Future:
+        """Queue an insert; the future resolves to (entry dict, rank or None)."""
+        self.start()
+        future: Future = Future()
+        self._queue.put((params, future))
+        return future
+
+    def _next_batch(self) -> Tuple[List[Tuple[ScoreParams, Future]], bool]:
+        """Block for the first item, then take whatever else is queued until
+        the batch is full, waiting up to `max_delay` for stragglers. Also
+        reports whether stop() was called."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        conn = database.pool.acquire()
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    self._write(conn, batch)
+                except Exception as e:
+                    # Keep the thread alive for later submissions, and never
+                    # leave a caller waiting on its future
+                    logger.exception("Leaderboard write batch failed")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+        finally:
+            database.pool.release(conn)
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[ScoreParams, Future]]) -> None:
+        """Insert a batch in one transaction, then resolve its futures."""
+        try:
+            rows = [conn.execute(INSERT_SQL, params).fetchone() for params, _ in batch]
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if len(batch) == 1:
+                logger.exception("Failed to write leaderboard entry")
+                batch[0][1].set_exception(e)
+                return
+            # Retry one by one so a single bad row doesn't fail the others
+            for item in batch:
+                self._write(conn, [item])
+            return
+
+        # The rows are committed; a failure here only affects its own caller
+        for row, (_, future) in zip(rows, batch):
+            try:
+                entry = entry_from_row(row)
+                future.set_result((entry, leaderboard_cache.add(entry)))
+            except Exception as e:
+                logger.exception("Failed to add leaderboard entry to the cache")
+                future.set_exception(e)
+
+
+score_writer = ScoreWriter()
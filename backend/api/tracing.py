@@ -0,0 +1,152 @@
+"""Opt-in per-request SQL tracing and slow-query logging.
+
+SQL_TRACE=1 collects every statement a request runs and reports them in a
+`Server-Timing` response header. SLOW_QUERY_MS=<n> logs statements slower
+than n milliseconds, with their `EXPLAIN QUERY PLAN`, to the
+`api.tracing.slow` logger. Both are off by default.
+"""
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, List, NamedTuple, Optional
+
+ENABLED = os.getenv("SQL_TRACE", "").lower() in ("1", "true", "yes")
+
+_slow_ms = os.getenv("SLOW_QUERY_MS", "")
+SLOW_QUERY_SECONDS: Optional[float] = float(_slow_ms) / 1000 if _slow_ms else None
+
+# Slowest statements listed individually in Server-Timing; the rest only
+# count towards the db total
+SERVER_TIMING_STATEMENTS = 5
+SERVER_TIMING_DESC_LENGTH = 80
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger(__name__ + ".slow")
+
+
+class Statement(NamedTuple):
+    statement: str  # normalized SQL
+    seconds: float
+    rows: int
+
+
+_current: "contextvars.ContextVar[Optional[List[Statement]]]" = contextvars.ContextVar(
+    "sql_trace", default=None
+)
+
+
+def record(
+    conn: sqlite3.Connection,
+    sql: str,
+    parameters: Any,
+    statement: str,
+    seconds: float,
+    rows: int,
+) -> None:
+    """Add a finished statement to the request's trace and the slow log."""
+    trace = _current.get()
+    if trace is not None:
+        trace.append(Statement(statement, seconds, rows))
+    if SLOW_QUERY_SECONDS is not None and seconds >= SLOW_QUERY_SECONDS:
+        slow_logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "statement": statement,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "rows": rows,
+                    "plan": explain(conn, sql, parameters),
+                }
+            )
+        )
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters: Any) -> List[str]:
+    """`EXPLAIN QUERY PLAN` detail lines, indented by depth ([] if unavailable)."""
+    if parameters is None:
+        return []  # executemany: no single parameter set to plan with
+    try:
+        # A plain cursor, so the EXPLAIN isn't itself traced
+        rows = conn.cursor(sqlite3.Cursor).execute(
+            "EXPLAIN QUERY PLAN " + sql, parameters
+        ).fetchall()
+    except sqlite3.Error:
+        return []
+
+    depth = {0: 0}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, 0) + 1
+        plan.append("  " * (depth[node_id] - 1) + detail)
+    return plan
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def server_timing(trace: List[Statement], total: float) -> str:
+    """Server-Timing header value: request total, db total, slowest statements."""
+    db = sum(s.seconds for s in trace)
+    rows = sum(s.rows for s in trace)
+    entries = [
+        f"total;dur={total * 1000:.3f}",
+        f"db;dur={db * 1000:.3f};desc={_quote(f'{len(trace)} queries, {rows} rows')}",
+    ]
+    slowest = sorted(trace, key=lambda s: s.seconds, reverse=True)
+    for i, s in enumerate(slowest[:SERVER_TIMING_STATEMENTS], 1):
+        desc = f"{s.rows} rows: {s.statement[:SERVER_TIMING_DESC_LENGTH]}"
+        entries.append(f"sql-{i};dur={s.seconds * 1000:.3f};desc={_quote(desc)}")
+    return ", ".join(entries)
+
+
+class TracingMiddleware:
+    """ASGI middleware that traces each request's SQL into Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        trace: List[Statement] = []
+        # Sync routes run in a copy of this context, so they append to the
+        # same list
+        token = _current.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing(trace, time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1", "replace"))
+                ]
+                if trace:
+                    logger.debug(
+                        json.dumps(
+                            {
+                                "event": "request_sql",
+                                "method": scope["method"],
+                                "path": scope["path"],
+                                "statements": [
+                                    {
+                                        "statement": s.statement,
+                                        "duration_ms": round(s.seconds * 1000, 3),
+                                        "rows": s.rows,
+                                    }
+                                    for s in trace
+                                ],
+                            }
+                        )
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
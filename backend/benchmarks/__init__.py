@@ -0,0 +1 @@
+"""Benchmarks for the Streasy Guessr backend."""
@@ -0,0 +1,108 @@
+"""
+Benchmark: per-worker startup time and memory, catalog from SQLite vs snapshot.
+
+Starts N worker processes at once. Each gets the catalog either by reading
+the apartments table (what every worker did before snapshots) or by mapping
+the shared snapshot file, then runs a few filtered counts and pages so the
+columns are actually touched. Reports load time and the worker's private
+memory growth (Linux /proc/self/smaps_rollup; other systems fall back to
+peak RSS, which includes shared pages).
+
+Usage (from backend/):
+    python -m benchmarks.bench_catalog_snapshot [--rows 100000] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from api import catalog_snapshot
+from api.catalog import ApartmentCatalog
+from benchmarks.synthetic import create_apartments_db
+
+
+def private_mb() -> float:
+    """Memory only this process uses (private clean + dirty pages)."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    kb = sum(int(fields[k].split()[0]) for k in ("Private_Clean", "Private_Dirty"))
+    return kb / 1024
+
+
+def worker(mode: str, db_path: Path, results) -> None:
+    before = private_mb()
+    start = time.perf_counter()
+    if mode == "sqlite":
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        catalog = ApartmentCatalog.load(conn)
+        conn.close()
+    else:
+        snapshot = catalog_snapshot.read(catalog_snapshot.snapshot_path(db_path))
+        catalog = ApartmentCatalog.from_snapshot(snapshot)
+    elapsed = time.perf_counter() - start
+
+    for borough in catalog.boroughs:
+        catalog.count(borough=borough)
+    after_id = None
+    for _ in range(100):
+        page, after_id = catalog.page_after(after_id, 100)
+    results.put((elapsed, private_mb() - before))
+
+
+def run(mode: str, db_path: Path, workers: int):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(mode, db_path, results)) for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    measured = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(Path(tmp) / "apartments.db", args.rows)
+
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        start = time.perf_counter()
+        _, updated_at = catalog_snapshot.source_version(conn)
+        catalog = ApartmentCatalog.load(conn)
+        catalog_snapshot.write(catalog_snapshot.snapshot_path(db_path), catalog, updated_at)
+        conn.close()
+        size = catalog_snapshot.snapshot_path(db_path).stat().st_size
+        print(
+            f"{args.rows} apartments; snapshot {size / 1e6:.1f} MB "
+            f"built in {time.perf_counter() - start:.2f}s"
+        )
+
+        print(f"{'source':<10} {'workers':>7} {'load ms':>9} {'private MB/worker':>18} {'total MB':>9}")
+        for mode in ("sqlite", "snapshot"):
+            measured = run(mode, db_path, args.workers)
+            load_ms = sum(t for t, _ in measured) / len(measured) * 1000
+            mb = [m for _, m in measured]
+            print(
+                f"{mode:<10} {args.workers:>7} {load_ms:>9.1f} "
+                f"{sum(mb) / len(mb):>18.1f} {sum(mb):>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
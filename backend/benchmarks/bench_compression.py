@@ -0,0 +1,127 @@
+"""
+Benchmark: wire bytes and CPU per request with response compression.
+
+Calls the ASGI app directly (no HTTP client in the measurement) for the
+larger JSON endpoints, three ways: without the compression middleware,
+with it but no precompressed cache (every response compressed), and with
+the cache (compressed once per URL and content version).
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression [--rows 10000] [--encoding br]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from api import compression, database
+from api.catalog import catalog_store
+from api.leaderboard_cache import leaderboard_cache
+from api.routes import apartments, leaderboard
+from benchmarks.synthetic import create_apartments_db
+
+ENDPOINTS = [
+    ("/api/apartments", b"limit=100"),
+    ("/api/apartments", b"limit=50&borough=Brooklyn"),
+    ("/api/leaderboard", b"limit=500"),
+    ("/api/leaderboard", b"limit=100"),
+    ("/api/apartments/random", b"count=5"),
+]
+
+
+def build_app() -> FastAPI:
+    """The JSON routers, without middleware."""
+    app = FastAPI()
+    app.include_router(apartments.router, prefix="/api")
+    app.include_router(leaderboard.router, prefix="/api")
+    return app
+
+
+async def request(app, path: str, query: bytes, encoding: str) -> int:
+    """One GET straight through the ASGI app; returns the body size."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query,
+        "headers": [(b"host", b"bench"), (b"accept-encoding", encoding.encode())],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+def measure(app, path: str, query: bytes, encoding: str, iterations: int):
+    """(bytes per response, CPU microseconds per request)."""
+
+    async def run():
+        size = await request(app, path, query, encoding)  # warm caches
+        start = time.process_time()
+        for _ in range(iterations):
+            await request(app, path, query, encoding)
+        return size, (time.process_time() - start) / iterations * 1e6
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument(
+        "--encoding",
+        default="br" if compression.brotli is not None else "gzip",
+        choices=["br", "gzip"],
+    )
+    args = parser.parse_args()
+
+    routes = build_app()
+    variants = [
+        ("identity", routes),
+        ("no cache", compression.CompressionMiddleware(routes, cache=compression.CompressedCache(0))),
+        ("cached", compression.CompressionMiddleware(routes)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(Path(tmp) / "apartments.db", args.rows, leaderboard=args.rows)
+        database.pool = database.ConnectionPool(db_path)
+        catalog_store.refresh(force=True)
+        with database.pool.connection() as conn:
+            leaderboard_cache.load(conn)
+
+        print(f"encoding: {args.encoding}")
+        print(
+            f"{'endpoint':<44} {'variant':<9} {'bytes':>8} {'ratio':>6} {'CPU us/req':>11}"
+        )
+        for path, query in ENDPOINTS:
+            name = f"{path}?{query.decode()}"
+            plain = None
+            for label, app in variants:
+                encoding = "identity" if label == "identity" else args.encoding
+                size, cpu = measure(app, path, query, encoding, args.iterations)
+                plain = plain or size
+                print(f"{name:<44} {label:<9} {size:>8} {size / plain:>6.2f} {cpu:>11.1f}")
+        database.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Load test: requests per second with and without the connection pool.
+
+Drives routes that still borrow a pooled connection on every request, from
+several client threads, once with pooling disabled (a new connection per
+request, as before) and once with the pool. Apartment reads are served from
+the in-memory catalog now, so the load is /leaderboard/stats plus a by-id
+apartment lookup in SQL (what /apartments/{id} did before the catalog).
+
+Usage (from backend/):
+    python -m benchmarks.bench_connection_pool [--rows 10000] [--threads 16]
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import database
+from api.database import row_to_dict
+from api.routes import leaderboard
+from benchmarks.synthetic import create_apartments_db
+
+
+def build_app() -> FastAPI:
+    """The leaderboard router plus a route reading an apartment through the
+    pool, with none of the app's middleware."""
+    app = FastAPI()
+    app.include_router(leaderboard.router, prefix="/api")
+
+    @app.get("/bench/apartments/{apartment_id}")
+    def apartment_from_sql(apartment_id: int):
+        with database.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM apartments WHERE id = ?", (apartment_id,)
+            ).fetchone()
+        return row_to_dict(row) if row else None
+
+    return app
+
+
+def run_load(app: FastAPI, rows: int, threads: int, duration: float) -> float:
+    """Hit the pooled endpoints from `threads` clients; return requests/s."""
+    stop_at = time.perf_counter() + duration
+    counts = [0] * threads
+
+    def worker(slot: int):
+        rng = random.Random(slot)
+        client = TestClient(app)
+        while time.perf_counter() < stop_at:
+            if rng.random() < 0.5:
+                client.get("/api/leaderboard/stats")
+            else:
+                client.get(f"/bench/apartments/{rng.randint(1, rows)}")
+            counts[slot] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    app = build_app()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(
+            Path(tmp) / "apartments.db", args.rows, leaderboard=args.rows
+        )
+
+        results = {}
+        for label, size in (("no pool", 0), ("pool", database.POOL_SIZE)):
+            database.pool = database.ConnectionPool(db_path, size)
+            results[label] = run_load(app, args.rows, args.threads, args.duration)
+            database.pool.close()
+            print(f"{label:>8}: {results[label]:8.1f} req/s")
+
+        print(f"speedup: {results['pool'] / results['no pool']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: listing photos served per second.
+
+Starts uvicorn on the same directory of synthetic .webp files: with the old
+StaticFiles mount, with the API's /images endpoint on loose files, and once
+more after packing them (api.image_pack). Each
+run fetches random photos from keep-alive client threads (a skewed mix, so
+some photos are hot), then repeats with If-None-Match to show what
+revalidating clients cost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_images [--images 2000] [--size-kb 150]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+from api.image_pack import pack
+from benchmarks.load import BACKEND_DIR, Client, run_scenario, wait_for_server
+from benchmarks.synthetic import create_apartments_db
+
+
+def static_app() -> FastAPI:
+    """The previous setup: StaticFiles over IMAGES_DIR (uvicorn --factory)."""
+    app = FastAPI()
+    app.get("/health")(lambda: {"status": "healthy"})
+    app.mount("/images", StaticFiles(directory=os.environ["IMAGES_DIR"]), name="images")
+    return app
+
+
+def create_images(directory: Path, count: int, size: int) -> list:
+    """`count` random-content files named like real listing photos."""
+    names = []
+    rng = random.Random(0)
+    for i in range(count):
+        name = f"{1000 + i // 5}_{i % 5}.webp"
+        (directory / name).write_bytes(rng.randbytes(size))
+        names.append(name)
+    return names
+
+
+def start(target: str, images_dir: Path, db_path: Path, port: int) -> subprocess.Popen:
+    env = dict(os.environ, IMAGES_DIR=str(images_dir), DB_PATH=str(db_path))
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", *target.split(),
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--size-kb", type=int, default=150)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    servers = [
+        ("StaticFiles", "benchmarks.bench_images:static_app --factory"),
+        ("/images endpoint", "api.main:app"),
+        ("/images packed", "api.main:app"),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images_dir = Path(tmp) / "images"
+        images_dir.mkdir()
+        names = create_images(images_dir, args.images, args.size_kb * 1024)
+        # The API needs a database to start, even though photos don't use it
+        db_path = create_apartments_db(Path(tmp) / "apartments.db", 100)
+        etags = {}
+
+        def fetch(client: Client, rng: random.Random, rows: int) -> int:
+            # Pareto-ish skew: most requests go to a small set of photos
+            name = names[min(int(rng.paretovariate(1.2)) - 1, len(names) - 1)]
+            return client.request("GET", f"/images/{name}")[0]
+
+        def revalidate(client: Client, rng: random.Random, rows: int) -> int:
+            name = rng.choice(names)
+            client.conn.request("GET", f"/images/{name}", headers={"If-None-Match": etags[name]})
+            response = client.conn.getresponse()
+            response.read()
+            return 200 if response.status == 304 else response.status
+
+        print(f"{'server':<18} {'scenario':<12} {'img/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'MB/s':>8}")
+        for label, target in servers:
+            if label == "/images packed":
+                pack(images_dir, images_dir / "packs")
+            server = start(target, images_dir, db_path, args.port)
+            try:
+                wait_for_server(base_url)
+                client = Client(base_url)
+                for name in names:
+                    client.conn.request("GET", f"/images/{name}")
+                    response = client.conn.getresponse()
+                    response.read()
+                    etags[name] = response.getheader("etag")
+
+                for scenario_name, scenario in (("fetch", fetch), ("revalidate", revalidate)):
+                    r = run_scenario(base_url, scenario, 0, args.concurrency, args.duration)
+                    mb = r["rps"] * args.size_kb / 1024 if scenario is fetch else 0
+                    print(
+                        f"{label:<18} {scenario_name:<12} {r['rps']:>9.1f} "
+                        f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {mb:>8.1f}"
+                        + (f"  ({r['errors']} errors)" if r["errors"] else "")
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
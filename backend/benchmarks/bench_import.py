@@ -0,0 +1,109 @@
+"""
+Benchmark: importing scraped_apartments.json, old importer vs streaming one.
+
+The old importer (json.load of the whole file, one execute per row,
+IntegrityError for duplicates) is reproduced here for comparison. Each
+import runs in its own process so peak memory is measured separately:
+first into an empty database, then again over the same data with 10% of the
+rents changed (the old importer skips those rows; the new one updates them).
+
+Usage (from backend/):
+    python -m benchmarks.bench_import [--rows 100000]
+"""
+import argparse
+import json
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import SCHEMA_PATH, apartment_rows
+from db.import_data import COLUMNS, apartment_params, import_apartments, peak_memory_mb
+
+JSON_COLUMNS = ("home_features", "amenities", "image_ids")
+
+
+def write_scraped(path: Path, rows: int, changed_every: int = 0) -> None:
+    """Scraper-style JSON (indent=2) of synthetic listings."""
+    apartments = []
+    for i, row in enumerate(apartment_rows(rows)):
+        apt = dict(zip(COLUMNS, row))
+        for column in JSON_COLUMNS:
+            apt[column] = json.loads(apt[column])
+        if changed_every and i % changed_every == 0:
+            apt["rent"] += 100
+        apartments.append(apt)
+    with open(path, "w") as f:
+        json.dump(apartments, f, indent=2)
+
+
+def old_import(data_path: Path, db_path: Path) -> None:
+    with open(data_path) as f:
+        apartments = json.load(f)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for apt in apartments:
+        try:
+            cursor.execute(
+                f"INSERT INTO apartments ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                apartment_params(apt),
+            )
+        except sqlite3.IntegrityError:
+            continue
+    conn.execute(
+        "UPDATE catalog_meta SET generation = generation + 1, "
+        "updated_at = CURRENT_TIMESTAMP WHERE id = 1"
+    )
+    conn.commit()
+    conn.close()
+
+
+def worker(importer: str, data_path: Path, db_path: Path, results) -> None:
+    start = time.perf_counter()
+    if importer == "old":
+        old_import(data_path, db_path)
+    else:
+        import_apartments(data_path, db_path)
+    results.put((time.perf_counter() - start, peak_memory_mb()))
+
+
+def timed(importer: str, data_path: Path, db_path: Path):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=worker, args=(importer, data_path, db_path, results))
+    process.start()
+    measured = results.get()
+    process.join()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        fresh, changed = tmp / "scraped.json", tmp / "scraped_changed.json"
+        write_scraped(fresh, args.rows)
+        write_scraped(changed, args.rows, changed_every=10)
+        print(f"{args.rows} listings, {fresh.stat().st_size / 1e6:.0f} MB of JSON")
+
+        print(f"{'importer':<9} {'run':<14} {'seconds':>8} {'rows/s':>9} {'peak MB':>8}")
+        for importer in ("old", "new"):
+            db_path = tmp / f"{importer}.db"
+            conn = sqlite3.connect(db_path)
+            conn.executescript(SCHEMA_PATH.read_text())
+            conn.close()
+            for run, data in (("empty db", fresh), ("10% changed", changed)):
+                seconds, peak = timed(importer, data, db_path)
+                print(
+                    f"{importer:<9} {run:<14} {seconds:>8.2f} "
+                    f"{args.rows / seconds:>9,.0f} {peak:>8.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
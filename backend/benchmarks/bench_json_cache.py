@@ -0,0 +1,108 @@
+"""
+Benchmark: per-request CPU for building apartment responses.
+
+Compares the old pipeline (row_to_dict, json.loads of the JSON columns,
+popping private fields, then FastAPI's jsonable_encoder + JSONResponse) with
+joining the catalog's pre-rendered JSON bytes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_cache [--rows 10000]
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.catalog import ApartmentCatalog
+from api.database import row_to_dict
+from api.responses import json_response
+from benchmarks.synthetic import create_apartments_db
+
+
+def encoded(content) -> bytes:
+    """What FastAPI does with a route's plain dict return value."""
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def old_random(rows, count):
+    apartments = [row_to_dict(row) for row in random.sample(rows, count)]
+    for apt in apartments:
+        apt.pop("rent")
+        apt.pop("image_ids", None)
+    return encoded({"apartments": apartments, "count": len(apartments)})
+
+
+def new_random(catalog, count):
+    positions = catalog.sample(count)
+    apartments = b",".join(catalog.public_json[pos] for pos in positions)
+    return json_response(
+        b'{"apartments":[%b],"count":%d}' % (apartments, len(positions))
+    ).body
+
+
+def old_get(rows, apartment_id):
+    return encoded(row_to_dict(rows[apartment_id - 1]))
+
+
+def new_get(catalog, apartment_id):
+    return json_response(catalog.get(apartment_id)).body
+
+
+def old_list(rows, limit):
+    apartments = [row_to_dict(row) for row in rows[:limit]]
+    return encoded(
+        {"apartments": apartments, "total": len(rows), "skip": 0, "limit": limit}
+    )
+
+
+def new_list(catalog, limit):
+    apartments, _ = catalog.page_after(None, limit)
+    total = catalog.count()
+    return json_response(
+        b'{"apartments":[%b],"total":%d,"skip":%d,"limit":%d}'
+        % (b",".join(apartments), total, 0, limit)
+    ).body
+
+
+def cpu_us(fn, iterations: int) -> float:
+    """Average CPU time of `fn()` in microseconds."""
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(Path(tmp) / "apartments.db", args.rows)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT * FROM apartments ORDER BY id").fetchall()
+        catalog = ApartmentCatalog.load(conn)
+        conn.close()
+
+    cases = [
+        ("/apartments/random?count=5", old_random, new_random, 5),
+        ("/apartments/{id}", old_get, new_get, args.rows // 2),
+        ("/apartments?limit=100", old_list, new_list, 100),
+    ]
+
+    print(f"{'endpoint':<28} {'old us/req':>11} {'cached us/req':>14} {'speedup':>8}")
+    for name, old, new, arg in cases:
+        old_us = cpu_us(lambda: old(rows, arg), args.iterations)
+        new_us = cpu_us(lambda: new(catalog, arg), args.iterations)
+        print(f"{name:<28} {old_us:>11.1f} {new_us:>14.1f} {old_us / new_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
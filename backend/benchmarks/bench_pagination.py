@@ -0,0 +1,73 @@
+"""
+Benchmark: /apartments page latency vs. page depth.
+
+Compares SQL `LIMIT/OFFSET` (the original listing query), offset paging over
+the catalog, and keyset paging with a cursor, for a filtered listing.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pagination [--rows 200000]
+"""
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from api.catalog import ApartmentCatalog
+from benchmarks.synthetic import create_apartments_db
+
+LIMIT = 50
+FILTERS = dict(borough="Brooklyn", neighborhood=None, min_bedrooms=1, max_bedrooms=None)
+
+
+def median_ms(fn, iterations: int = 20) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(Path(tmp) / "apartments.db", args.rows)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        catalog = ApartmentCatalog.load(conn)
+
+        total = catalog.count(**FILTERS)
+        print(f"{total} matching rows, {LIMIT} per page")
+        print(f"{'page':>8}  {'SQL OFFSET ms':>14}  {'catalog skip ms':>16}  {'cursor ms':>10}")
+
+        for page in (0, 10, 100, (total // LIMIT) - 1):
+            skip = page * LIMIT
+            # Cursor for this page: the id of the last row on the previous one
+            after_id = None
+            if skip:
+                _, after_id = catalog.query(skip=skip - LIMIT, limit=LIMIT, **FILTERS)
+
+            sql_ms = median_ms(
+                lambda: conn.execute(
+                    """
+                    SELECT * FROM apartments
+                    WHERE borough = ? AND bedrooms >= ?
+                    ORDER BY id LIMIT ? OFFSET ?
+                """,
+                    (FILTERS["borough"], FILTERS["min_bedrooms"], LIMIT, skip),
+                ).fetchall()
+            )
+            skip_ms = median_ms(lambda: catalog.query(skip=skip, limit=LIMIT, **FILTERS))
+            cursor_ms = median_ms(lambda: catalog.page_after(after_id, LIMIT, **FILTERS))
+            print(f"{page:>8}  {sql_ms:>14.3f}  {skip_ms:>16.3f}  {cursor_ms:>10.3f}")
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: random apartment selection latency vs. catalog size.
+
+Compares the old `COUNT(*)` + `ORDER BY RANDOM()` query with sampling from
+the in-memory apartment catalog.
+
+Usage (from backend/):
+    python -m benchmarks.bench_random_sampling [--sizes 500,10000,100000,1000000]
+"""
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from api.catalog import ApartmentCatalog
+from benchmarks.synthetic import create_apartments_db
+
+COUNT = 5
+
+
+def order_by_random(conn: sqlite3.Connection) -> list:
+    """The previous implementation of /apartments/random."""
+    conn.execute("SELECT COUNT(*) FROM apartments").fetchone()
+    return conn.execute(
+        "SELECT * FROM apartments ORDER BY RANDOM() LIMIT ?", (COUNT,)
+    ).fetchall()
+
+
+def sampled(catalog: ApartmentCatalog) -> list:
+    """The catalog-based implementation of /apartments/random."""
+    return [catalog.public_json[pos] for pos in catalog.sample(COUNT)]
+
+
+def time_calls(fn, iterations: int) -> float:
+    """Return the median latency of `fn()` in milliseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="500,10000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(f"{'rows':>10}  {'ORDER BY RANDOM() ms':>21}  {'catalog ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            db_path = create_apartments_db(Path(tmp) / f"apartments_{rows}.db", rows)
+            conn = sqlite3.connect(db_path)
+
+            conn.row_factory = sqlite3.Row
+            catalog = ApartmentCatalog.load(conn)
+
+            # ORDER BY RANDOM() is too slow to repeat many times on big tables
+            old_iterations = max(5, min(args.iterations, 2_000_000 // rows))
+            old_ms = time_calls(lambda: order_by_random(conn), old_iterations)
+            new_ms = time_calls(lambda: sampled(catalog), args.iterations)
+
+            print(f"{rows:>10}  {old_ms:>21.3f}  {new_ms:>11.3f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
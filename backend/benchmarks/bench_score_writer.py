@@ -0,0 +1,98 @@
+"""
+Benchmark: leaderboard submits per second under concurrency.
+
+Compares one INSERT + COMMIT per submission (the previous submit_score)
+with queueing submissions for the group-committing score writer.
+
+Usage (from backend/):
+    python -m benchmarks.bench_score_writer [--threads 32] [--submits 200]
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from api import database
+from api.score_writer import INSERT_SQL, ScoreWriter
+from benchmarks.synthetic import create_apartments_db
+
+
+def params(rng: random.Random) -> tuple:
+    """Random ScoreParams."""
+    total_score = rng.randint(0, 500)
+    return (
+        f"player{rng.randint(0, 9999)}",
+        rng.choice(["NY", "LA", None]),
+        total_score,
+        5,
+        total_score / 5,
+    )
+
+
+def commit_each(rng: random.Random) -> None:
+    """The previous submit_score: its own transaction per submission."""
+    with database.pool.connection() as conn:
+        conn.execute(INSERT_SQL, params(rng)).fetchone()
+        conn.commit()
+
+
+def run(submit, threads: int, submits: int) -> float:
+    """Run `submits` submissions on each of `threads` threads; return submits/s."""
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        for _ in range(submits):
+            submit(rng)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return threads * submits / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--submits", type=int, default=200, help="per thread")
+    parser.add_argument(
+        "--synchronous",
+        default="NORMAL",
+        help="SQLite synchronous pragma to benchmark with (NORMAL or FULL)",
+    )
+    parser.add_argument(
+        "--max-delay", type=float, default=None, help="score writer linger (s)"
+    )
+    args = parser.parse_args()
+
+    pragmas = database.PRAGMAS
+    database.PRAGMAS = pragmas + (f"PRAGMA synchronous = {args.synchronous}",)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(Path(tmp) / "apartments.db", 0)
+        database.pool = database.ConnectionPool(db_path, args.threads + 1)
+
+        direct = run(commit_each, args.threads, args.submits)
+        print(f"commit per submit: {direct:9.1f} submits/s")
+
+        writer = ScoreWriter()
+        if args.max_delay is not None:
+            writer.max_delay = args.max_delay
+        batched = run(
+            lambda rng: writer.submit(params(rng)).result(), args.threads, args.submits
+        )
+        writer.stop()
+        print(f"score writer:      {batched:9.1f} submits/s")
+        print(f"speedup: {batched / direct:.2f}x")
+
+        database.pool.close()
+
+    database.PRAGMAS = pragmas
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: serialization CPU per response, for the routes that build dicts.
+
+For the same content, compares FastAPI's default path for a returned dict
+(jsonable_encoder + JSONResponse), its response_model path (validate into
+the model, then Pydantic's JSON dump) and what the routes do now (orjson
+straight from the dict, via api.responses.json_response). Every orjson body
+is checked against the route's response model first.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--rows 10000]
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from api.catalog import ApartmentCatalog
+from api.leaderboard_cache import LeaderboardCache
+from api.responses import json_response
+from api.routes.apartments import (
+    GuessBatch,
+    GuessBatchResult,
+    GuessResult,
+    validate_guesses,
+)
+from api.routes.leaderboard import (
+    Leaderboard,
+    LeaderboardStats,
+    SubmittedScore,
+    leaderboard_stats,
+)
+from benchmarks.synthetic import create_apartments_db
+
+
+def encoder(content) -> bytes:
+    """FastAPI with no response_model: walk with jsonable_encoder, json.dumps."""
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def model_dump(adapter: TypeAdapter):
+    """FastAPI with a response_model: validate, then dump in pydantic-core."""
+    return lambda content: adapter.dump_json(adapter.validate_python(content))
+
+
+def fast(content) -> bytes:
+    return json_response(content).body
+
+
+def cpu_us(fn, iterations: int) -> float:
+    """Average CPU time of `fn()` in microseconds."""
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_apartments_db(
+            Path(tmp) / "apartments.db", args.rows, leaderboard=args.rows
+        )
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        catalog = ApartmentCatalog.load(conn)
+        cache = LeaderboardCache()
+        cache.load(conn)
+        stats = leaderboard_stats(conn)
+        conn.close()
+
+    def leaderboard(limit):
+        entries = cache.top(limit)
+        return {
+            "leaderboard": entries,
+            "total_entries": len(entries),
+            "filtered_by_location": None,
+        }
+
+    guesses = GuessBatch(
+        guesses=[
+            {"apartment_id": int(catalog.id[pos]), "guessed_rent": 3000}
+            for pos in range(0, len(catalog), len(catalog) // 10)[:10]
+        ]
+    )
+    batch = orjson.loads(validate_guesses(guesses, catalog).body)
+    entry = cache.top(1)[0]
+    submitted = {
+        "id": entry["id"],
+        "player_name": entry["player_name"],
+        "location": entry["location"],
+        "total_score": entry["total_score"],
+        "rounds_played": entry["rounds_played"],
+        "average_score": entry["average_score"],
+        "rank": 1,
+        "message": "Score submitted successfully!",
+    }
+
+    cases = [
+        ("GET /leaderboard?limit=500", Leaderboard, leaderboard(500)),
+        ("GET /leaderboard?limit=100", Leaderboard, leaderboard(100)),
+        ("GET /leaderboard/stats", LeaderboardStats, stats),
+        ("POST /leaderboard", SubmittedScore, submitted),
+        ("POST /apartments/validate-guess", GuessResult, batch["results"][0]),
+        ("POST /apartments/validate-guesses", GuessBatchResult, batch),
+    ]
+
+    print(
+        f"{'endpoint':<34} {'bytes':>7} {'encoder us':>11} {'model us':>9} "
+        f"{'orjson us':>10} {'vs encoder':>11}"
+    )
+    for name, model, content in cases:
+        adapter = TypeAdapter(model)
+        body = fast(content)
+        adapter.validate_json(body)  # the routes' output matches their schema
+        assert orjson.loads(body) == orjson.loads(encoder(content)), name
+
+        encoder_us = cpu_us(lambda: encoder(content), args.iterations)
+        model_us = cpu_us(lambda: model_dump(adapter)(content), args.iterations)
+        fast_us = cpu_us(lambda: fast(content), args.iterations)
+        print(
+            f"{name:<34} {len(body):>7} {encoder_us:>11.1f} {model_us:>9.1f} "
+            f"{fast_us:>10.1f} {encoder_us / fast_us:>10.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
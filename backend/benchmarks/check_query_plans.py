@@ -0,0 +1,153 @@
+"""
+Query-plan regression check for every SQL statement in the API.
+
+Finds SQL string literals (including f-strings built from module constants)
+in the `api` package, runs EXPLAIN QUERY PLAN for each against a synthetic
+database built from db/schema.sql, and fails on:
+
+- a full table scan (`SCAN <table>`), unless the statement is marked with a
+  `-- plan: full-scan` comment because it deliberately reads everything
+- a full index scan without a LIMIT
+- a temp B-tree (a sort or DISTINCT the indexes don't cover)
+
+Usage (from backend/):
+    python -m benchmarks.check_query_plans [--rows 1000000] [--db path]
+
+Exits with status 1 if any statement fails.
+"""
+import argparse
+import ast
+import importlib
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, NamedTuple
+
+import api
+from benchmarks.synthetic import create_apartments_db
+
+API_DIR = Path(api.__file__).parent
+
+SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\s")
+FULL_SCAN_MARKER = "plan: full-scan"
+LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+class Statement(NamedTuple):
+    location: str
+    sql: str
+
+
+def find_statements() -> Iterator[Statement]:
+    """Yield every SQL literal in the api package. f-strings are evaluated
+    against their module's globals; ones that need local values are reported
+    and skipped."""
+    for path in sorted(API_DIR.rglob("*.py")):
+        relative = path.relative_to(API_DIR.parent).with_suffix("")
+        module_name = ".".join(relative.parts)
+        tree = ast.parse(path.read_text(), str(path))
+
+        # Literal chunks of an f-string are visited separately by ast.walk
+        fragments = {
+            id(part)
+            for node in ast.walk(tree)
+            if isinstance(node, ast.JoinedStr)
+            for part in node.values
+        }
+
+        for node in sorted(ast.walk(tree), key=lambda n: getattr(n, "lineno", 0)):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                if id(node) in fragments:
+                    continue
+                text = node.value
+            elif isinstance(node, ast.JoinedStr):
+                first = node.values[0] if node.values else None
+                if not (
+                    isinstance(first, ast.Constant) and SQL_START.match(first.value)
+                ):
+                    continue
+                try:
+                    text = eval(
+                        compile(ast.Expression(node), str(path), "eval"),
+                        vars(importlib.import_module(module_name)),
+                    )
+                except NameError as e:
+                    print(f"? {relative}:{node.lineno}: skipped f-string ({e})")
+                    continue
+            else:
+                continue
+
+            if SQL_START.match(text):
+                yield Statement(f"{relative}:{node.lineno}", text)
+
+
+def plan_problems(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN `sql` and describe anything that would not scale."""
+    params = (1,) * sql.count("?")
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    problems = []
+    for detail in plan:
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN ") and not detail.startswith(
+            ("SCAN (subquery", "SCAN CONSTANT ROW")
+        ):
+            if "USING" not in detail:
+                if FULL_SCAN_MARKER not in sql:
+                    problems.append(f"full table scan: {detail}")
+            elif not LIMIT.search(sql):
+                problems.append(f"full index scan without LIMIT: {detail}")
+    return problems
+
+
+def check(conn: sqlite3.Connection) -> bool:
+    """Check every statement; print a report; return True if all pass."""
+    failures = 0
+    statements = list(find_statements())
+    for statement in statements:
+        try:
+            problems = plan_problems(conn, statement.sql)
+        except sqlite3.Error as e:
+            problems = [f"EXPLAIN failed: {e}"]
+
+        if problems:
+            failures += 1
+            print(f"✗ {statement.location}")
+            print("    " + " ".join(statement.sql.split()))
+            for problem in problems:
+                print(f"    -> {problem}")
+        else:
+            print(f"✓ {statement.location}")
+
+    print(f"\n{len(statements) - failures}/{len(statements)} statements pass")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", type=Path, help="check against an existing database")
+    args = parser.parse_args()
+
+    if args.db:
+        conn = sqlite3.connect(args.db)
+        ok = check(conn)
+        conn.close()
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"Building synthetic database with {args.rows} rows per table...")
+            db_path = create_apartments_db(
+                Path(tmp) / "apartments.db", args.rows, leaderboard=args.rows
+            )
+            conn = sqlite3.connect(db_path)
+            ok = check(conn)
+            conn.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
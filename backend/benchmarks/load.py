@@ -0,0 +1,276 @@
+"""
+HTTP load driver and latency report for the API.
+
+Runs each endpoint scenario for a fixed time against a local uvicorn, from
+several keep-alive client threads, and reports throughput and p50/p95/p99
+latency per endpoint. Results are written as JSON so runs from different
+commits can be diffed.
+
+Usage (from backend/):
+    # start uvicorn on a fresh synthetic database, run, write results
+    python -m benchmarks.load --size 100k --output results.json
+
+    # against a server that's already running
+    python -m benchmarks.load --url http://127.0.0.1:8000 --rows 5000
+
+    # compare with an earlier run
+    python -m benchmarks.load --size 100k --output new.json --baseline old.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import LOCATIONS, SIZES, create_apartments_db
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# A scenario takes (client, rng, rows) and returns the HTTP status
+Scenario = Callable[["Client", random.Random, int], int]
+
+
+class Client:
+    """Minimal keep-alive HTTP client, one per load thread."""
+
+    def __init__(self, base_url: str):
+        url = urllib.parse.urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        try:
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Server closed the connection; reconnect once
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+        return response.status, response.read()
+
+
+def random_apartments(client: Client, rng: random.Random, rows: int) -> int:
+    return client.request("GET", "/api/apartments/random?count=5")[0]
+
+
+def list_apartments(client: Client, rng: random.Random, rows: int) -> int:
+    query = rng.choice(
+        ["", "borough=Brooklyn", "borough=Manhattan&min_bedrooms=2", "neighborhood=Astoria"]
+    )
+    return client.request("GET", f"/api/apartments?limit=50&{query}")[0]
+
+
+def get_apartment(client: Client, rng: random.Random, rows: int) -> int:
+    return client.request("GET", f"/api/apartments/{rng.randint(1, rows)}")[0]
+
+
+def validate_guess(client: Client, rng: random.Random, rows: int) -> int:
+    return client.request(
+        "POST",
+        "/api/apartments/validate-guess",
+        {"apartment_id": rng.randint(1, rows), "guessed_rent": rng.randint(1500, 9000)},
+    )[0]
+
+
+def leaderboard(client: Client, rng: random.Random, rows: int) -> int:
+    query = rng.choice(["limit=100", "limit=500", f"limit=100&location={LOCATIONS[0]}"])
+    return client.request("GET", f"/api/leaderboard?{urllib.parse.quote(query, safe='=&')}")[0]
+
+
+def leaderboard_stats(client: Client, rng: random.Random, rows: int) -> int:
+    return client.request("GET", "/api/leaderboard/stats")[0]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "GET /apartments/random": random_apartments,
+    "GET /apartments": list_apartments,
+    "GET /apartments/{id}": get_apartment,
+    "POST /apartments/validate-guess": validate_guess,
+    "GET /leaderboard": leaderboard,
+    "GET /leaderboard/stats": leaderboard_stats,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(
+    base_url: str, scenario: Scenario, rows: int, concurrency: int, duration: float
+) -> dict:
+    """Drive one scenario from `concurrency` threads for `duration` seconds."""
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop_at = time.perf_counter() + duration
+
+    def worker(slot: int):
+        client = Client(base_url)
+        rng = random.Random(slot)
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                status = scenario(client, rng, rows)
+            except (http.client.HTTPException, OSError):
+                status = 0
+            latencies[slot].append((time.perf_counter() - start) * 1000)
+            if status >= 400 or status == 0:
+                errors[slot] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(ms for per_thread in latencies for ms in per_thread)
+    return {
+        "requests": len(samples),
+        "errors": sum(errors),
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+def wait_for_server(base_url: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if Client(base_url).request("GET", "/health")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+def start_server(db_path: Path, port: int, workers: int) -> subprocess.Popen:
+    """Start uvicorn on `db_path` in the background."""
+    env = dict(os.environ, DB_PATH=str(db_path))
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: dict, baseline: Optional[dict] = None) -> None:
+    """Print a table of the results, with % change against a baseline run."""
+    header = f"{'endpoint':<34} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results["endpoints"].items():
+        print(
+            f"{name:<34} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}"
+        )
+        old = (baseline or {}).get("endpoints", {}).get(name)
+        if old:
+            changes = "  ".join(
+                f"{key} {((r[key] - old[key]) / old[key] * 100 if old[key] else 0):+.1f}%"
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            )
+            print(f"{'  vs ' + str(baseline.get('commit')):<34} {changes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="existing server; otherwise uvicorn is started")
+    parser.add_argument(
+        "--size", default="100k", help=f"synthetic rows: {', '.join(SIZES)} or a number"
+    )
+    parser.add_argument("--rows", type=int, help="apartment count on an existing server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--endpoints", help="comma-separated subset of scenario names")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare against")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.endpoints:
+        wanted = [name.strip() for name in args.endpoints.split(",")]
+        scenarios = {name: SCENARIOS[name] for name in wanted}
+
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            base_url = args.url
+            rows = args.rows or 1000
+        else:
+            rows = SIZES.get(args.size.lower()) or int(args.size)
+            print(f"Building synthetic database ({rows} rows per table)...")
+            db_path = create_apartments_db(Path(tmp) / "apartments.db", rows, leaderboard=rows)
+            base_url = f"http://127.0.0.1:{args.port}"
+            server = start_server(db_path, args.port, args.workers)
+
+        try:
+            wait_for_server(base_url)
+            results = {
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "rows": rows,
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "endpoints": {},
+            }
+            for name, scenario in scenarios.items():
+                print(f"  {name}...", flush=True)
+                results["endpoints"][name] = run_scenario(
+                    base_url, scenario, rows, args.concurrency, args.duration
+                )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print()
+    print_report(results, baseline)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Synthetic data for benchmarks.
+
+Builds a database from db/schema.sql filled with realistic-looking
+apartments and leaderboard entries. As a command (from backend/):
+    python -m benchmarks.synthetic --size 100k --out /tmp/apartments_100k.db
+"""
+import argparse
+import json
+import random
+import sqlite3
+from pathlib import Path
+from typing import Iterator, Tuple
+
+SCHEMA_PATH = Path(__file__).parent.parent / "db" / "schema.sql"
+
+# Named dataset sizes (rows in each table)
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+BOROUGHS = {
+    "Manhattan": ["East Village", "Chelsea", "Harlem", "Upper West Side", "Tribeca"],
+    "Brooklyn": ["Williamsburg", "Bushwick", "Park Slope", "Bed-Stuy", "Greenpoint"],
+    "Queens": ["Astoria", "Long Island City", "Ridgewood", "Sunnyside"],
+    "Bronx": ["Mott Haven", "Riverdale", "Fordham"],
+    "Staten Island": ["St. George", "Stapleton"],
+}
+
+HOME_FEATURES = [
+    "Dishwasher", "Washer/Dryer", "Hardwood floors", "Central air",
+    "Private outdoor space", "Walk-in closet", "Renovated kitchen",
+]
+
+AMENITIES = [
+    "doorman", "elevator", "gym", "roof_deck", "laundry", "bike_room",
+    "pets_allowed", "storage", "concierge", "package_room",
+]
+
+
+def apartment_rows(rows: int, seed: int = 0) -> Iterator[Tuple]:
+    """Yield apartment rows in the column order used by `create_apartments_db`."""
+    rng = random.Random(seed)
+    boroughs = list(BOROUGHS)
+
+    for i in range(rows):
+        borough = rng.choice(boroughs)
+        bedrooms = rng.choices([0, 1, 2, 3, 4], weights=[15, 40, 30, 12, 3])[0]
+        photo_count = rng.randint(1, 30)
+        yield (
+            f"https://streeteasy.com/rental/{i + 1}",
+            rng.randint(1800, 4500) + bedrooms * rng.randint(600, 1500),
+            rng.choice([None, 400 + bedrooms * rng.randint(200, 400)]),
+            bedrooms,
+            rng.choice([1.0, 1.0, 1.5, 2.0, 2.5]),
+            rng.choice(BOROUGHS[borough]),
+            borough,
+            f"{rng.randint(1, 999)} Example St {rng.randint(10001, 11697)}",
+            None,
+            json.dumps(rng.sample(HOME_FEATURES, rng.randint(0, 5))),
+            json.dumps(rng.sample(AMENITIES, rng.randint(0, 8))),
+            rng.choice([None, rng.randint(1890, 2024)]),
+            photo_count,
+            json.dumps([f"{rng.getrandbits(128):032x}" for _ in range(photo_count)]),
+            10_000_000 + i,
+            20_000_000 + i,
+        )
+
+
+LOCATIONS = [
+    "Brooklyn, NY", "Manhattan, NY", "Queens, NY", "Jersey City, NJ",
+    "Boston, MA", "Chicago, IL", "San Francisco, CA", "London, UK",
+]
+
+
+def leaderboard_rows(rows: int, seed: int = 0) -> Iterator[Tuple]:
+    """Yield (player_name, location, total_score, rounds_played, average_score,
+    created_at) leaderboard rows."""
+    rng = random.Random(seed)
+
+    for i in range(rows):
+        rounds_played = 5
+        total_score = int(rng.gammavariate(2.0, 60))
+        yield (
+            f"player{rng.randint(1, rows)}",
+            rng.choice(LOCATIONS) if rng.random() < 0.7 else None,
+            total_score,
+            rounds_played,
+            total_score / rounds_played,
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+        )
+
+
+def create_apartments_db(
+    path: Path, rows: int, seed: int = 0, leaderboard: int = 0
+) -> Path:
+    """Create a database at `path` from schema.sql with `rows` fake apartments
+    and `leaderboard` fake leaderboard entries."""
+    conn = sqlite3.connect(path)
+    # Throwaway data: skip the journal and syncs while loading
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        """
+        INSERT INTO apartments (
+            listing_url, rent, sqft, bedrooms, bathrooms,
+            neighborhood, borough, address, floor,
+            home_features, amenities, year_built,
+            photo_count, image_ids, listing_id, property_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        apartment_rows(rows, seed),
+    )
+    conn.executemany(
+        """
+        INSERT INTO leaderboard (
+            player_name, location, total_score, rounds_played, average_score, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """,
+        leaderboard_rows(leaderboard, seed),
+    )
+    conn.execute("UPDATE catalog_meta SET generation = generation + 1 WHERE id = 1")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic database")
+    parser.add_argument(
+        "--size", default="1k", help=f"rows per table: {', '.join(SIZES)} or a number"
+    )
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = SIZES.get(args.size.lower()) or int(args.size)
+    if args.out.exists():
+        args.out.unlink()
+    create_apartments_db(args.out, rows, seed=args.seed, leaderboard=rows)
+    print(f"✓ Wrote {rows} apartments and {rows} leaderboard entries to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
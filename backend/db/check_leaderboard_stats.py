@@ -0,0 +1,133 @@
+"""Check the trigger-maintained leaderboard aggregates against the raw table.
+
+Rebuilds total entries, score sum, max score and per-location counts from
+the leaderboard table and diffs them against leaderboard_stats and
+leaderboard_location_counts. Exits with status 1 on any mismatch.
+
+    python3 db/check_leaderboard_stats.py           # check only
+    python3 db/check_leaderboard_stats.py --repair  # check, then rewrite
+"""
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / "apartments.db"
+
+
+def rebuild(cursor: sqlite3.Cursor):
+    """Compute the aggregates from scratch."""
+    cursor.execute("""
+        SELECT COUNT(*), COALESCE(SUM(total_score), 0), MAX(total_score)
+        FROM leaderboard
+    """)
+    stats = tuple(cursor.fetchone())
+
+    cursor.execute("""
+        SELECT location, COUNT(*)
+        FROM leaderboard
+        WHERE location IS NOT NULL
+        GROUP BY location
+    """)
+    locations = dict(cursor.fetchall())
+
+    return stats, locations
+
+
+def stored(cursor: sqlite3.Cursor):
+    """Read the maintained aggregates."""
+    cursor.execute(
+        "SELECT total_entries, score_sum, max_score FROM leaderboard_stats WHERE id = 1"
+    )
+    row = cursor.fetchone()
+    stats = tuple(row) if row else None
+
+    cursor.execute("SELECT location, count FROM leaderboard_location_counts")
+    locations = dict(cursor.fetchall())
+
+    return stats, locations
+
+
+def diff(expected, actual) -> list:
+    """Human-readable differences between rebuilt and stored aggregates."""
+    (expected_stats, expected_locations) = expected
+    (actual_stats, actual_locations) = actual
+    problems = []
+
+    if actual_stats is None:
+        problems.append("leaderboard_stats row is missing")
+    else:
+        for name, want, got in zip(
+            ("total_entries", "score_sum", "max_score"), expected_stats, actual_stats
+        ):
+            if want != got:
+                problems.append(f"{name}: stored {got}, actual {want}")
+
+    for location in sorted(set(expected_locations) | set(actual_locations)):
+        want = expected_locations.get(location, 0)
+        got = actual_locations.get(location, 0)
+        if want != got:
+            problems.append(f"location {location!r}: stored {got}, actual {want}")
+
+    return problems
+
+
+def repair(conn: sqlite3.Connection, expected) -> None:
+    """Overwrite the summary tables with the rebuilt aggregates and commit.
+
+    Call inside the write transaction `expected` was rebuilt in.
+    """
+    (total_entries, score_sum, max_score), locations = expected
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT OR REPLACE INTO leaderboard_stats (id, total_entries, score_sum, max_score)
+        VALUES (1, ?, ?, ?)
+    """, (total_entries, score_sum, max_score))
+    cursor.execute("DELETE FROM leaderboard_location_counts")
+    cursor.executemany(
+        "INSERT INTO leaderboard_location_counts (location, count) VALUES (?, ?)",
+        locations.items(),
+    )
+    conn.commit()
+
+
+def check(db_path: Path = DB_PATH, fix: bool = False) -> bool:
+    """Diff the aggregates; optionally repair them. Returns True if consistent."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        # One transaction so both sides see the same snapshot. A repair takes
+        # the write lock up front: scores inserted between the rebuild and
+        # the rewrite would otherwise bump the counters, only to be
+        # overwritten with the older totals.
+        cursor.execute("BEGIN IMMEDIATE" if fix else "BEGIN")
+        try:
+            expected = rebuild(cursor)
+            problems = diff(expected, stored(cursor))
+
+            if not problems:
+                print("✓ Leaderboard stats are consistent")
+                return True
+
+            print(f"✗ Found {len(problems)} mismatches:")
+            for problem in problems:
+                print(f"  {problem}")
+
+            if fix:
+                repair(conn, expected)
+                print("✓ Rebuilt leaderboard_stats and leaderboard_location_counts")
+            return False
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check leaderboard aggregates")
+    parser.add_argument(
+        "--repair", action="store_true", help="rewrite the summary tables"
+    )
+    args = parser.parse_args()
+    sys.exit(0 if check(fix=args.repair) else 1)
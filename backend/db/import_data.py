@@ -1,71 +1,380 @@
-"""Import scraped apartment data from JSON into SQLite database."""
-import sqlite3
+"""Import scraped apartment data from JSON into SQLite database.
+
+The JSON array is parsed one listing at a time, so memory stays flat however
+large the file is, and staged into a temporary table through executemany
+batches. Only then is the database write lock taken, for one transaction
+that compares each listing's content hash with the one stored for its
+listing_url and applies just the delta: new listings inserted, changed ones
+updated, ones no longer in the file removed. What changed is recorded in
+catalog_changes for the new catalog generation.
+
+    python3 db/import_data.py [--data scraped_apartments.json] [--manifest changes.json]
+"""
+import argparse
+import hashlib
 import json
-import os
+import sqlite3
+import subprocess
+import sys
+import time
 from pathlib import Path
+from typing import Iterator, Sequence, TextIO
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Paths
 DB_DIR = Path(__file__).parent
 DB_PATH = DB_DIR / "apartments.db"
 DATA_PATH = DB_DIR.parent / "data" / "scraped_apartments.json"
 
+# Rows per executemany call
+BATCH_SIZE = 1000
+
+# Characters read from the JSON file at a time
+CHUNK_SIZE = 1 << 20
+
+# An import that would remove more than this share of the catalog (or is
+# empty) is refused without --allow-mass-delete: it's far more likely a
+# truncated or partial scrape than half of all listings going away
+MAX_REMOVED_FRACTION = 0.5
+
+# Applied for the import only. WAL + NORMAL can't corrupt the database on a
+# crash; the single transaction means a failed import changes nothing. The
+# staging table is as big as the input, so it goes to a temp file.
+IMPORT_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = FILE",
+    "PRAGMA cache_size = -65536",  # 64 MB
+    "PRAGMA busy_timeout = 5000",
+)
+
+COLUMNS = (
+    "listing_url", "rent", "sqft", "bedrooms", "bathrooms",
+    "neighborhood", "borough", "address", "floor",
+    "home_features", "amenities", "year_built",
+    "photo_count", "image_ids", "listing_id", "property_id",
+)
+HASHED = COLUMNS[1:]
+
+# Every listing of the file, in file order (a repeated listing_url keeps
+# its last occurrence)
+CREATE_STAGED = f"""
+    CREATE TEMP TABLE staged (
+        seq INTEGER PRIMARY KEY,
+        listing_url TEXT NOT NULL UNIQUE,
+        {", ".join(HASHED)},
+        content_hash TEXT NOT NULL
+    )
+"""
+STAGE = f"""
+    INSERT OR REPLACE INTO staged ({", ".join(COLUMNS)}, content_hash)
+    VALUES ({", ".join("?" for _ in COLUMNS)}, ?)
+"""
 
-def import_apartments():
-    """Load apartments from JSON and insert into database."""
-    # Load JSON data
-    with open(DATA_PATH, 'r') as f:
-        apartments = json.load(f)
+# The delta, applied set-wise once everything is staged
+COUNT_MISSING = """
+    SELECT COUNT(*) FROM apartments
+    WHERE listing_url NOT IN (SELECT listing_url FROM staged)
+"""
+REMOVE = """
+    DELETE FROM apartments
+    WHERE listing_url NOT IN (SELECT listing_url FROM staged)
+    RETURNING id
+"""
+UPDATE = f"""
+    UPDATE apartments SET
+        {", ".join(f"{c} = s.{c}" for c in HASHED)},
+        content_hash = s.content_hash
+    FROM staged AS s
+    WHERE s.listing_url = apartments.listing_url
+        AND apartments.content_hash IS NOT s.content_hash
+    RETURNING id
+"""
+INSERT = f"""
+    INSERT INTO apartments ({", ".join(COLUMNS)}, content_hash)
+    SELECT {", ".join(COLUMNS)}, content_hash FROM staged
+    WHERE listing_url NOT IN (SELECT listing_url FROM apartments)
+    ORDER BY seq
+    RETURNING id
+"""
 
-    print(f"Loaded {len(apartments)} apartments from JSON")
+MIGRATION = "python3 db/migrate_add_content_hash.py"
 
-    # Connect to database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Run from backend/, where the api package lives
+BACKEND_DIR = DB_DIR.parent
 
-    # Insert apartments
-    inserted = 0
-    skipped = 0
 
-    for apt in apartments:
+def iter_json_array(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[object]:
+    """Yield the items of the top-level JSON array in `f` one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        """Read the next chunk; False at end of file."""
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+        return bool(chunk)
+
+    def skip_whitespace() -> str:
+        """Next significant character ('' at end of file)."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos] if pos < len(buffer) else ""
+
+    if skip_whitespace() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if skip_whitespace() == "]":
+        return
+
+    while True:
         try:
-            cursor.execute("""
-                INSERT INTO apartments (
-                    listing_url, rent, sqft, bedrooms, bathrooms,
-                    neighborhood, borough, address, floor,
-                    home_features, amenities, year_built,
-                    photo_count, image_ids, listing_id, property_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                apt['listing_url'],
-                apt['rent'],
-                apt.get('sqft'),
-                apt['bedrooms'],
-                apt['bathrooms'],
-                apt['neighborhood'],
-                apt['borough'],
-                apt.get('address'),
-                apt.get('floor'),
-                json.dumps(apt.get('home_features', [])),
-                json.dumps(apt.get('amenities', [])),
-                apt.get('year_built'),
-                apt['photo_count'],
-                json.dumps(apt['image_ids']),
-                apt.get('listing_id'),
-                apt.get('property_id')
-            ))
-            inserted += 1
-        except sqlite3.IntegrityError:
-            # Duplicate listing_url
-            skipped += 1
-            continue
-
-    conn.commit()
-    conn.close()
-
-    print(f"✓ Imported {inserted} apartments")
-    if skipped > 0:
-        print(f"  Skipped {skipped} duplicates")
+            item, end = decoder.raw_decode(buffer, pos)
+            # A number cut off by the end of the buffer ("2" of "2.5") still
+            # decodes; only trust items followed by a separator
+            if not eof and (end == len(buffer) or buffer[end] not in ",] \t\r\n"):
+                raise json.JSONDecodeError("Item may continue", buffer, end)
+        except json.JSONDecodeError:
+            if fill():
+                continue
+            raise
+        pos = end
+        yield item
+
+        separator = skip_whitespace()
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, got {separator!r}")
+        skip_whitespace()
+
+
+def apartment_params(apt: dict) -> tuple:
+    """Row values in COLUMNS order."""
+    return (
+        apt['listing_url'],
+        apt['rent'],
+        apt.get('sqft'),
+        apt['bedrooms'],
+        float(apt['bathrooms']),  # REAL column; hashes the way it reads back
+        apt['neighborhood'],
+        apt['borough'],
+        apt.get('address'),
+        apt.get('floor'),
+        json.dumps(apt.get('home_features', [])),
+        json.dumps(apt.get('amenities', [])),
+        apt.get('year_built'),
+        apt['photo_count'],
+        json.dumps(apt['image_ids']),
+        apt.get('listing_id'),
+        apt.get('property_id'),
+    )
+
+
+def content_hash(values: Sequence) -> str:
+    """Hash of a listing's HASHED column values, as stored."""
+    encoded = json.dumps(list(values), separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process so far (0 if unknown)."""
+    try:
+        # Linux; unlike ru_maxrss it isn't inherited from the parent on exec
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def check_schema(conn: sqlite3.Connection) -> None:
+    """Exit with instructions if the database predates content hashes."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(apartments)")}
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    if "content_hash" not in columns or "catalog_changes" not in tables:
+        sys.exit(f"✗ Database needs migrating first: {MIGRATION}")
+
+
+def check_removals(conn: sqlite3.Connection, listings: int) -> None:
+    """Exit if the staged file would empty or mostly empty the catalog."""
+    missing = conn.execute(COUNT_MISSING).fetchone()[0]
+    if not missing:
+        return
+    total = conn.execute("SELECT COUNT(*) FROM apartments").fetchone()[0]
+    if listings == 0 or missing > total * MAX_REMOVED_FRACTION:
+        sys.exit(
+            f"✗ Refusing to remove {missing} of {total} apartments "
+            f"({listings} listings in the file); pass --keep-missing for a "
+            f"partial file or --allow-mass-delete if this is intended"
+        )
+
+
+def import_apartments(
+    data_path: Path = DATA_PATH,
+    db_path: Path = DB_PATH,
+    batch_size: int = BATCH_SIZE,
+    keep_missing: bool = False,
+    allow_mass_delete: bool = False,
+) -> dict:
+    """
+    Bring the apartments table in line with the JSON file.
+
+    Listings are staged and hashed, then only the delta is written: new
+    listing_urls are inserted, listings whose content hash changed are
+    updated, and listings missing from the file are removed (unless
+    `keep_missing`, for partial files). An empty file, or one that would
+    remove more than MAX_REMOVED_FRACTION of the catalog, exits without
+    changing anything unless `allow_mass_delete`. Returns the change
+    manifest, which is also stored in catalog_changes under the new catalog
+    generation.
+    """
+    start = time.perf_counter()
+
+    # Autocommit mode: the transactions below are managed explicitly
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in IMPORT_PRAGMAS:
+        conn.execute(pragma)
+    check_schema(conn)
+
+    read = 0
+    try:
+        # Staging only writes the temp database, so the API and other
+        # writers aren't held up while the file is parsed
+        conn.execute("BEGIN")
+        conn.execute(CREATE_STAGED)
+        batch = []
+        with open(data_path, encoding="utf-8") as f:
+            for apt in iter_json_array(f):
+                params = apartment_params(apt)
+                batch.append(params + (content_hash(params[1:]),))
+                read += 1
+                if len(batch) >= batch_size:
+                    conn.executemany(STAGE, batch)
+                    batch.clear()
+        if batch:
+            conn.executemany(STAGE, batch)
+        conn.execute("COMMIT")
+
+        # The delta and the generation bump, under the write lock
+        conn.execute("BEGIN IMMEDIATE")
+        listings = conn.execute("SELECT COUNT(*) FROM staged").fetchone()[0]
+        if not keep_missing and not allow_mass_delete:
+            check_removals(conn, listings)
+
+        removed = [] if keep_missing else [row[0] for row in conn.execute(REMOVE)]
+        updated = [row[0] for row in conn.execute(UPDATE)]
+        inserted = [row[0] for row in conn.execute(INSERT)]
+        conn.execute("DROP TABLE staged")
+
+        generation = conn.execute(
+            "SELECT generation FROM catalog_meta WHERE id = 1"
+        ).fetchone()[0]
+        if inserted or updated or removed:
+            # Tell running API processes that the catalog changed
+            generation += 1
+            conn.execute("""
+                UPDATE catalog_meta
+                SET generation = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+            """, (generation,))
+            conn.execute(
+                "INSERT INTO catalog_changes (generation, inserted, updated, removed) "
+                "VALUES (?, ?, ?, ?)",
+                (generation, json.dumps(inserted), json.dumps(updated), json.dumps(removed)),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✓ Imported {read} apartments in {elapsed:.2f}s "
+        f"({read / elapsed if elapsed else 0:,.0f} rows/s, "
+        f"peak memory {peak_memory_mb():.0f} MB)"
+    )
+    print(
+        f"  {len(inserted)} new, {len(updated)} updated, {len(removed)} removed, "
+        f"{listings - len(inserted) - len(updated)} unchanged"
+    )
+    return {
+        "generation": generation,
+        "inserted": inserted,
+        "updated": updated,
+        "removed": removed,
+    }
+
+
+def build_snapshot(db_path: Path) -> None:
+    """Rebuild the API's catalog snapshot for `db_path`.
+
+    The import is already committed, so a failure only means the first API
+    worker to start builds the snapshot itself.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "api.catalog_snapshot", "--db", str(Path(db_path).resolve())],
+        cwd=BACKEND_DIR,
+    )
+    if result.returncode:
+        print("  ✗ Couldn't rebuild the catalog snapshot; the API will build it on startup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import scraped apartments")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="don't remove listings that aren't in the file (partial imports)",
+    )
+    parser.add_argument(
+        "--allow-mass-delete",
+        action="store_true",
+        help="remove missing listings even if the file is empty or lacks most of them",
+    )
+    parser.add_argument("--manifest", type=Path, help="also write the changes here as JSON")
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="don't rebuild the API's catalog snapshot after a change",
+    )
+    args = parser.parse_args()
+
+    manifest = import_apartments(
+        args.data, args.db, args.batch_size, args.keep_missing, args.allow_mass_delete
+    )
+    if args.manifest:
+        args.manifest.write_text(json.dumps(manifest, indent=2))
+        print(f"  Change manifest written to {args.manifest}")
+    changed = manifest["inserted"] or manifest["updated"] or manifest["removed"]
+    if changed and not args.no_snapshot:
+        build_snapshot(args.db)
 
 
 if __name__ == "__main__":
-    import_apartments()
+    main()
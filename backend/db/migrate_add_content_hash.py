@@ -0,0 +1,53 @@
+"""Migration: Add content_hash to apartments and the catalog_changes table."""
+import sqlite3
+from pathlib import Path
+
+from import_data import HASHED, content_hash
+
+DB_PATH = Path(__file__).parent / "apartments.db"
+
+
+def migrate():
+    """Add the column and table if they don't exist, and hash existing rows."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_info(apartments)")
+        columns = [row[1] for row in cursor.fetchall()]
+
+        if "content_hash" not in columns:
+            print("Adding content_hash column...")
+            cursor.execute("ALTER TABLE apartments ADD COLUMN content_hash TEXT")
+            print("✓ Added content_hash column")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_changes (
+                generation INTEGER PRIMARY KEY,
+                inserted TEXT NOT NULL,
+                updated TEXT NOT NULL,
+                removed TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Hash what is stored, so the next import only touches real changes
+        cursor.execute(
+            f"SELECT id, {', '.join(HASHED)} FROM apartments WHERE content_hash IS NULL"
+        )
+        hashes = [(content_hash(row[1:]), row[0]) for row in cursor.fetchall()]
+        cursor.executemany("UPDATE apartments SET content_hash = ? WHERE id = ?", hashes)
+        print(f"✓ Hashed {len(hashes)} apartments")
+
+        conn.commit()
+        print("✓ Migration complete")
+
+    except Exception as e:
+        print(f"✗ Migration failed: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
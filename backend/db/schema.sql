@@ -17,14 +17,41 @@ CREATE TABLE IF NOT EXISTS apartments (
     image_ids TEXT NOT NULL, -- JSON array stored as text
     listing_id INTEGER, -- From scraped data
     property_id INTEGER, -- From scraped data
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_hash TEXT -- Of the scraped fields; db/import_data.py skips unchanged listings
+);
+
+-- id is the rowid, so a separate index on it is redundant
+DROP INDEX IF EXISTS idx_apartments_id;
+
+-- Catalog generation, bumped by every import so API processes know to
+-- reload anything they derived from the apartments table
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO catalog_meta (id, generation) VALUES (1, 0);
+
+-- What each import changed, so consumers that are a few generations behind
+-- can refresh just those apartments. Ids are JSON arrays.
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    generation INTEGER PRIMARY KEY,
+    inserted TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    removed TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Index for random selection queries
-CREATE INDEX IF NOT EXISTS idx_apartments_id ON apartments(id);
+-- Index for filtering by borough, or borough + neighborhood
+-- (replaces idx_apartments_location, which led with neighborhood)
+DROP INDEX IF EXISTS idx_apartments_location;
+CREATE INDEX IF NOT EXISTS idx_apartments_borough_neighborhood
+    ON apartments(borough, neighborhood);
 
--- Index for filtering by neighborhood/borough
-CREATE INDEX IF NOT EXISTS idx_apartments_location ON apartments(neighborhood, borough);
+-- Index for filtering by neighborhood alone
+CREATE INDEX IF NOT EXISTS idx_apartments_neighborhood ON apartments(neighborhood);
 
 -- Index for filtering by bedroom count
 CREATE INDEX IF NOT EXISTS idx_apartments_bedrooms ON apartments(bedrooms);
@@ -40,8 +67,99 @@ CREATE TABLE IF NOT EXISTS leaderboard (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Index for leaderboard queries (top scores)
-CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard(total_score DESC);
+-- Index for leaderboard queries: ORDER BY total_score DESC, created_at
+-- (replaces idx_leaderboard_score, which needed a sort for created_at)
+DROP INDEX IF EXISTS idx_leaderboard_score;
+CREATE INDEX IF NOT EXISTS idx_leaderboard_ranking
+    ON leaderboard(total_score DESC, created_at);
+
+-- Index for per-location leaderboards: WHERE location = ? in ranking order
+-- (replaces idx_leaderboard_location)
+DROP INDEX IF EXISTS idx_leaderboard_location;
+CREATE INDEX IF NOT EXISTS idx_leaderboard_location_ranking
+    ON leaderboard(location, total_score DESC, created_at);
+
+
+-- Running aggregates for /leaderboard/stats, kept current by the triggers
+-- below so the endpoint never scans the leaderboard table.
+-- db/check_leaderboard_stats.py rebuilds them from scratch and diffs.
+CREATE TABLE IF NOT EXISTS leaderboard_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_entries INTEGER NOT NULL DEFAULT 0,
+    score_sum INTEGER NOT NULL DEFAULT 0,
+    max_score INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS leaderboard_location_counts (
+    location TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+
+-- Index for top locations (most submissions)
+CREATE INDEX IF NOT EXISTS idx_leaderboard_location_counts_count
+    ON leaderboard_location_counts(count DESC, location);
+
+-- Backfill when the summary tables are first created on an existing database
+-- (no-ops afterwards, since the triggers keep them in step)
+INSERT OR IGNORE INTO leaderboard_stats (id, total_entries, score_sum, max_score)
+SELECT 1, COUNT(*), COALESCE(SUM(total_score), 0), MAX(total_score)
+FROM leaderboard;
+
+INSERT OR IGNORE INTO leaderboard_location_counts (location, count)
+SELECT location, COUNT(*)
+FROM leaderboard
+WHERE location IS NOT NULL
+GROUP BY location;
+
+CREATE TRIGGER IF NOT EXISTS leaderboard_stats_after_insert
+AFTER INSERT ON leaderboard
+BEGIN
+    UPDATE leaderboard_stats
+    SET total_entries = total_entries + 1,
+        score_sum = score_sum + NEW.total_score,
+        max_score = MAX(COALESCE(max_score, NEW.total_score), NEW.total_score)
+    WHERE id = 1;
+
+    INSERT INTO leaderboard_location_counts (location, count)
+    SELECT NEW.location, 1
+    WHERE NEW.location IS NOT NULL
+    ON CONFLICT(location) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS leaderboard_stats_after_delete
+AFTER DELETE ON leaderboard
+BEGIN
+    UPDATE leaderboard_stats
+    SET total_entries = total_entries - 1,
+        score_sum = score_sum - OLD.total_score,
+        max_score = (SELECT MAX(total_score) FROM leaderboard)
+    WHERE id = 1;
+
+    UPDATE leaderboard_location_counts
+    SET count = count - 1
+    WHERE location = OLD.location;
+
+    DELETE FROM leaderboard_location_counts
+    WHERE location = OLD.location AND count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS leaderboard_stats_after_update
+AFTER UPDATE OF total_score, location ON leaderboard
+BEGIN
+    UPDATE leaderboard_stats
+    SET score_sum = score_sum - OLD.total_score + NEW.total_score,
+        max_score = (SELECT MAX(total_score) FROM leaderboard)
+    WHERE id = 1;
+
+    UPDATE leaderboard_location_counts
+    SET count = count - 1
+    WHERE location = OLD.location;
+
+    DELETE FROM leaderboard_location_counts
+    WHERE location = OLD.location AND count <= 0;
 
--- Index for filtering by location
-CREATE INDEX IF NOT EXISTS idx_leaderboard_location ON leaderboard(location);
+    INSERT INTO leaderboard_location_counts (location, count)
+    SELECT NEW.location, 1
+    WHERE NEW.location IS NOT NULL
+    ON CONFLICT(location) DO UPDATE SET count = count + 1;
+END;
@@ -1,7 +1,9 @@
+import argparse
 import asyncio
 import nodriver as uc
 from nodriver import cdp
 import json
+import os
 import time
 import random
 import typing
@@ -298,6 +300,95 @@ async def scrape_listing(listing_url: str, tab: uc.Tab) -> dict | None:
         return None
 
 
+# Append-only logs: one JSON record per line, fsync'd after every write, so
+# progress costs one line per listing and a crash loses at most the line
+# being written
+PROGRESS_LOG = "scraped_apartments.jsonl"
+FAILED_LOG = "failed_urls.jsonl"
+
+# What --compact writes: the JSON array db/import_data.py reads
+COMPACTED_FILE = "scraped_apartments.json"
+
+
+def repair_log(path: str, block_size: int = 64 * 1024) -> None:
+    """Cut off a line left half-written by a crash, so appends start clean.
+
+    Only the tail of the log is read: blocks are scanned backwards from the
+    end until the last newline turns up.
+    """
+    try:
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            keep = 0
+            pos = end
+            while pos > 0:
+                start = max(0, pos - block_size)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                pos = start
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+            print(f"  Dropped an incomplete last record from {path}")
+    except FileNotFoundError:
+        pass
+
+
+def read_log(path: str) -> typing.Iterator[dict]:
+    """Records of a JSONL log, skipping a torn last line."""
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # Incomplete write; repair_log removes it
+                if line.strip():
+                    yield json.loads(line)
+    except FileNotFoundError:
+        return
+
+
+def append_log(f: typing.TextIO, record: dict) -> None:
+    """Append one record and make sure it reached the disk."""
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def compact(log_path: str = PROGRESS_LOG, out_path: str = COMPACTED_FILE) -> None:
+    """Write the log as one JSON array, keeping the last record per listing_url.
+
+    Two passes over the log, so only the URLs are held in memory; the output
+    is written to a temporary file and renamed into place.
+    """
+    last_line = {}
+    for line_no, apt in enumerate(read_log(log_path)):
+        last_line[apt.get("listing_url", line_no)] = line_no
+    keep = set(last_line.values())
+
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("[")
+        written = 0
+        for line_no, apt in enumerate(read_log(log_path)):
+            if line_no in keep:
+                f.write(",\n" if written else "\n")
+                f.write(json.dumps(apt))
+                written += 1
+        f.write("\n]\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+    print(f"✓ Compacted {written} apartments from {log_path} into {out_path}")
+
+
 async def collect_listing_data():
     """
     Phase 2: Visit each URL directly and scrape listing data
@@ -320,35 +411,50 @@ async def collect_listing_data():
     print("URLs shuffled for unpredictable scraping order")
 
     # Track progress
-    scraped_apartments = []
+    scraped_count = 0
     failed_urls = []
 
-    # Load existing progress if file exists
-    progress_file = "scraped_apartments.json"
-    try:
-        with open(progress_file, "r") as f:
+    # A run from before the JSONL log: carry its results over once
+    if not os.path.exists(PROGRESS_LOG) and os.path.exists(COMPACTED_FILE):
+        with open(COMPACTED_FILE, "r") as f:
             existing_data = json.load(f)
-            if isinstance(existing_data, list):
-                scraped_apartments = existing_data
-                print(
-                    f"Loaded {len(scraped_apartments)} previously scraped apartments"
-                )
-
-            # Skip URLs we've already scraped
-            scraped_urls = {
-                apt["listing_url"] for apt in scraped_apartments if "listing_url" in apt
-            }
-            all_urls = [url for url in all_urls if url not in scraped_urls]
-            print(f"Skipping {len(scraped_urls)} already scraped URLs")
-            print(f"  Remaining URLs to scrape: {len(all_urls)}")
-    except FileNotFoundError:
-        print("  No existing progress file found - starting fresh")
+        # Written aside and renamed, so a crash can't leave a partial log
+        # that would stop the carry-over from running again
+        tmp_path = f"{PROGRESS_LOG}.tmp"
+        with open(tmp_path, "w") as log:
+            for apt in existing_data if isinstance(existing_data, list) else []:
+                log.write(json.dumps(apt) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(tmp_path, PROGRESS_LOG)
+        print(f"Copied {COMPACTED_FILE} into {PROGRESS_LOG}")
+
+    # Resume from the progress log
+    repair_log(PROGRESS_LOG)
+    repair_log(FAILED_LOG)
+    scraped_urls = set()
+    for apt in read_log(PROGRESS_LOG):
+        scraped_count += 1
+        if "listing_url" in apt:
+            scraped_urls.add(apt["listing_url"])
+    if scraped_count:
+        print(f"Loaded {scraped_count} previously scraped apartments")
+
+        # Skip URLs we've already scraped
+        all_urls = [url for url in all_urls if url not in scraped_urls]
+        print(f"Skipping {len(scraped_urls)} already scraped URLs")
+        print(f"  Remaining URLs to scrape: {len(all_urls)}")
+    else:
+        print("  No existing progress log found - starting fresh")
+
+    progress_log = open(PROGRESS_LOG, "a")
+    failed_log = open(FAILED_LOG, "a")
 
     # Process each listing with a fresh browser session
     for idx, url in enumerate(all_urls, 1):
         print(f'\n\n{"*"*60}')
         print(
-            f"LISTING {idx}/{len(all_urls)} (Total scraped: {len(scraped_apartments)})"
+            f"LISTING {idx}/{len(all_urls)} (Total scraped: {scraped_count})"
         )
         print(f'{"*"*60}')
 
@@ -369,34 +475,29 @@ async def collect_listing_data():
             apartment_data = await scrape_listing(url, tab)
 
             if apartment_data:
-                scraped_apartments.append(apartment_data)
-                print(
-                    f"\nSUCCESS! Total apartments scraped: {len(scraped_apartments)}"
-                )
+                scraped_count += 1
+                print(f"\nSUCCESS! Total apartments scraped: {scraped_count}")
 
                 # Save progress immediately after each success
-                with open(progress_file, "w") as f:
-                    json.dump(scraped_apartments, f, indent=2)
-                print(f"Progress saved to {progress_file}")
+                append_log(progress_log, apartment_data)
+                print(f"Progress saved to {PROGRESS_LOG}")
             else:
                 failed_urls.append(url)
                 print(f"\nFAILED. Total failures: {len(failed_urls)}")
 
-                # Save failed URLs
-                with open("failed_urls.json", "w") as f:
-                    json.dump(
-                        {
-                            "failed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                            "count": len(failed_urls),
-                            "urls": failed_urls,
-                        },
-                        f,
-                        indent=2,
-                    )
+                # Save failed URL
+                append_log(
+                    failed_log,
+                    {"url": url, "failed_at": time.strftime("%Y-%m-%d %H:%M:%S")},
+                )
 
         except Exception as e:
             print(f"\nError processing listing: {e}")
             failed_urls.append(url)
+            append_log(
+                failed_log,
+                {"url": url, "failed_at": time.strftime("%Y-%m-%d %H:%M:%S")},
+            )
 
         finally:
             # Always close the browser after each listing
@@ -412,23 +513,39 @@ async def collect_listing_data():
             print(f'\n{"~"*60}')
             print(f"PROGRESS CHECK: {idx}/{len(all_urls)} processed")
             print(
-                f"   Successes: {len(scraped_apartments)} | Failures: {len(failed_urls)}"
+                f"   Successes: {scraped_count} | Failures: {len(failed_urls)}"
             )
             print(f"   Taking a {break_time/60:.1f} minute break...")
             print(f'{"~"*60}')
             await asyncio.sleep(break_time)
 
+    progress_log.close()
+    failed_log.close()
+
     # Final summary
     print(f'\n\n{"="*60}')
     print(f"SCRAPING COMPLETE!")
     print("=" * 60)
-    print(f"Total apartments scraped: {len(scraped_apartments)}")
+    print(f"Total apartments scraped: {scraped_count}")
     print(f"Total failures: {len(failed_urls)}")
-    if (len(scraped_apartments) + len(failed_urls)) > 0:
+    if (scraped_count + len(failed_urls)) > 0:
         print(
-            f"Success rate: {len(scraped_apartments)/(len(scraped_apartments)+len(failed_urls))*100:.1f}%"
+            f"Success rate: {scraped_count/(scraped_count+len(failed_urls))*100:.1f}%"
         )
+    print(f"Run with --compact to write {COMPACTED_FILE} for db/import_data.py")
 
 
 if __name__ == "__main__":
-    uc.loop().run_until_complete(collect_listing_data())
+    parser = argparse.ArgumentParser(description="Scrape listing data")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help=f"write {PROGRESS_LOG} out as {COMPACTED_FILE} instead of scraping",
+    )
+    parser.add_argument("--out", default=COMPACTED_FILE, help="output of --compact")
+    args = parser.parse_args()
+
+    if args.compact:
+        compact(PROGRESS_LOG, args.out)
+    else:
+        uc.loop().run_until_complete(collect_listing_data())
@@ -0,0 +1,126 @@
+"""
+Generate narrower copies of every listing photo for responsive images.
+
+For each images/{listing_id}_{i}.webp (1536px wide, from collect_imgs.py)
+writes images/w{width}/{listing_id}_{i}.webp for each width in WIDTHS, which
+the API serves for /images/{name}?w=<width>. Work is spread over a process
+pool, one photo per task.
+
+Incremental and idempotent: a derivative is only (re)built when it is
+missing or older than its source, and files are written to a temporary
+name and renamed into place, so an interrupted run leaves no partial
+images behind.
+
+Usage (from backend/):
+    python scripts/make_derivatives.py [--images images] [--workers N] [--force]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+# Keep in sync with api.images.DERIVATIVE_WIDTHS
+WIDTHS = (320, 640, 1024)
+
+WEBP_QUALITY = 80
+
+
+def stale_widths(source: Path, force: bool = False) -> List[int]:
+    """Widths whose derivative of `source` is missing or out of date."""
+    source_mtime = source.stat().st_mtime_ns
+    stale = []
+    for width in WIDTHS:
+        target = source.parent / f"w{width}" / source.name
+        try:
+            if not force and target.stat().st_mtime_ns >= source_mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        stale.append(width)
+    return stale
+
+
+def make_derivatives(source: Path, widths: List[int]) -> Tuple[int, Dict[int, int]]:
+    """Resize one photo to each width; returns its size and each derivative's."""
+    sizes = {}
+    with Image.open(source) as image:
+        image.load()
+        for width in widths:
+            target = source.parent / f"w{width}" / source.name
+            if image.width <= width:
+                # Never upscale; a narrow original is its own derivative
+                resized = image
+            else:
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            resized.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(tmp, target)
+            sizes[width] = target.stat().st_size
+    return source.stat().st_size, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=Path, default=Path("images"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="rebuild everything")
+    args = parser.parse_args()
+
+    if not args.images.is_dir():
+        print(f"✗ Error: {args.images} not found!")
+        print("Run collect_imgs.py first to download the photos.")
+        return
+
+    for width in WIDTHS:
+        (args.images / f"w{width}").mkdir(exist_ok=True)
+
+    sources = sorted(args.images.glob("*_*.webp"))
+    jobs = [(source, stale_widths(source, args.force)) for source in sources]
+    jobs = [(source, widths) for source, widths in jobs if widths]
+    print(
+        f"{len(sources)} photos, {len(jobs)} need derivatives "
+        f"({', '.join(f'{w}px' for w in WIDTHS)}), {args.workers} workers"
+    )
+    if not jobs:
+        return
+
+    start_time = time.time()
+    failed = 0
+    original_bytes = 0
+    width_bytes = {width: [0, 0] for width in WIDTHS}  # width -> [files, bytes]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(make_derivatives, source, widths) for source, widths in jobs]
+        for (source, _), future in zip(jobs, futures):
+            try:
+                original, sizes = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ {source.name}: {e}")
+                continue
+            original_bytes += original
+            for width, size in sizes.items():
+                width_bytes[width][0] += 1
+                width_bytes[width][1] += size
+
+    elapsed = time.time() - start_time
+    done = len(jobs) - failed
+    print(f"✓ {done} photos in {elapsed:.1f}s ({done / elapsed:.1f}/s), {failed} failed")
+    if done:
+        print(f"  original: {original_bytes / done / 1024:.0f} KB average")
+        for width, (files, size) in width_bytes.items():
+            if files:
+                average = size / files
+                print(
+                    f"  {width:>5}px: {average / 1024:.0f} KB average "
+                    f"({average / (original_bytes / done):.0%} of the original)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 import { useEffect, useState } from "react";
 import { Carousel, CarouselContent, CarouselItem, CarouselNext, CarouselPrevious } from "@/components/ui/carousel";
 import Image from "next/image";
-import { getApartmentImageUrl } from "@/lib/apartmentService";
+import { apartmentImageLoader, getImageUrl } from "@/lib/apartmentService";
 import { useGameStore } from "@/stores/gameStore";
 import LandingModal from "@/components/LandingModal";
 import Header from "@/components/ui/Header";
@@ -92,13 +92,22 @@ export default function Home() {
           <div className="lg:col-span-2 px-8 select-none">
             <Carousel key={currentApartment?.id} className="w-full">
               <CarouselContent>
-                {Array.from({ length: 5 }).map((_, index) => (
-                  <CarouselItem key={index}>
-                    <div className="w-full aspect-[4/3] relative bg-gray-200 dark:bg-neutral-700 pointer-events-none">
-                      <Image src={getApartmentImageUrl(currentApartment, index)} alt={`Apartment photo ${index + 1}`} fill className="object-cover rounded-md" />
+                {currentApartment.images.length > 0 ? (
+                  currentApartment.images.map(getImageUrl).map((src, index) => (
+                    <CarouselItem key={src}>
+                      <div className="w-full aspect-[4/3] relative bg-gray-200 dark:bg-neutral-700 pointer-events-none">
+                        <Image src={src} loader={apartmentImageLoader} sizes="(min-width: 1024px) 66vw, 100vw" alt={`Apartment photo ${index + 1}`} fill className="object-cover rounded-md" />
+                      </div>
+                    </CarouselItem>
+                  ))
+                ) : (
+                  <CarouselItem>
+                    {/* No photos on the server for this listing */}
+                    <div className="w-full aspect-[4/3] flex items-center justify-center rounded-md bg-gray-200 dark:bg-neutral-700 text-sm text-gray-500 dark:text-gray-400">
+                      No photos available
                     </div>
                   </CarouselItem>
-                ))}
+                )}
               </CarouselContent>
               <CarouselPrevious />
               <CarouselNext />
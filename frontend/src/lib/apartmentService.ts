@@ -25,6 +25,17 @@ export interface ApartmentResponse {
 export interface RandomApartmentsResponse {
   apartments: ApartmentResponse[];
   count: number;
+  round_token: string;
+}
+
+export interface RoundApartmentResponse extends ApartmentResponse {
+  images: string[]; // Paths of the photos that exist, e.g. /images/123_0.webp
+}
+
+export interface NewGameResponse {
+  rounds: RoundApartmentResponse[];
+  count: number;
+  round_token: string;
 }
 
 export interface ValidateGuessResponse {
@@ -36,6 +47,12 @@ export interface ValidateGuessResponse {
   score: number;
 }
 
+export interface ValidateGuessesResponse {
+  results: ValidateGuessResponse[];
+  total_score: number;
+  count: number;
+}
+
 /**
  * Get random apartments for gameplay
  * @param count - Number of random apartments to fetch (default: 1)
@@ -60,14 +77,37 @@ export async function getRandomApartments(
   }
 }
 
+/**
+ * Get every apartment for a game in one request, from distinct neighborhoods
+ * @param rounds - Number of rounds (1-10)
+ */
+export async function getNewGame(rounds: number = 5): Promise<NewGameResponse> {
+  try {
+    const response = await fetch(
+      `${API_BASE}/rounds/new?rounds=${Math.min(rounds, 10)}`,
+    );
+
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Failed to fetch new game:", error);
+    throw error;
+  }
+}
+
 /**
  * Validate a rent guess for a specific apartment
  * @param apartmentId - The apartment ID
  * @param guessedRent - The user's guessed rent amount
+ * @param roundToken - round_token from getRandomApartments, if available
  */
 export async function validateGuess(
   apartmentId: number,
   guessedRent: number,
+  roundToken?: string,
 ): Promise<ValidateGuessResponse> {
   try {
     const response = await fetch(`${API_BASE}/apartments/validate-guess`, {
@@ -78,6 +118,7 @@ export async function validateGuess(
       body: JSON.stringify({
         apartment_id: apartmentId,
         guessed_rent: guessedRent,
+        round_token: roundToken,
       }),
     });
 
@@ -92,6 +133,41 @@ export async function validateGuess(
   }
 }
 
+/**
+ * Validate every guess of a game in a single request
+ * @param guesses - Apartment IDs paired with the user's guessed rents
+ * @param roundToken - round_token from getRandomApartments, if available
+ */
+export async function validateGuesses(
+  guesses: { apartmentId: number; guessedRent: number }[],
+  roundToken?: string,
+): Promise<ValidateGuessesResponse> {
+  try {
+    const response = await fetch(`${API_BASE}/apartments/validate-guesses`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({
+        guesses: guesses.map(({ apartmentId, guessedRent }) => ({
+          apartment_id: apartmentId,
+          guessed_rent: guessedRent,
+        })),
+        round_token: roundToken,
+      }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error("Failed to validate guesses:", error);
+    throw error;
+  }
+}
+
 /**
  * Get a specific apartment by ID (includes rent for verification)
  * @param apartmentId - The apartment ID
@@ -131,3 +207,30 @@ export function getApartmentImageUrl(
   const imageBase = baseUrl.replace("/api", ""); // Remove /api if present
   return `${imageBase}/images/${apartment.listing_id}_${photoIndex}.webp`;
 }
+
+/**
+ * Absolute URL of a photo path from the rounds endpoint (e.g. /images/123_0.webp)
+ */
+export function getImageUrl(path: string): string {
+  const baseUrl = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+  const imageBase = baseUrl.replace("/api", ""); // Images are served at root /images
+  return `${imageBase}${path}`;
+}
+
+/**
+ * next/image loader for apartment photos: asks the backend for the
+ * pre-generated derivative closest to the rendered width (?w=), so small
+ * screens and thumbnails don't download the 1536px original
+ */
+export function apartmentImageLoader({
+  src,
+  width,
+}: {
+  src: string;
+  width: number;
+}): string {
+  if (!src.includes("/images/")) {
+    return src; // Placeholder
+  }
+  return `${src}?w=${width}`;
+}
@@ -16,6 +16,7 @@ export interface Apartment {
   home_features: string[];
   listing_id: number;
   property_id: number;
+  images: string[]; // Photo paths on the API host, e.g. /images/123_0.webp
 }
 
 export interface GuessResult {
@@ -29,7 +30,9 @@ export interface GuessResult {
 
 interface GameState {
   // Current game state
+  rounds: Apartment[]; // Every apartment of the game, fetched up front
   currentApartment: Apartment | null;
+  roundToken: string | null; // Encrypted answers for every round
   currentRound: number;
   totalRounds: number;
   totalScore: number;
@@ -39,7 +42,7 @@ interface GameState {
   error: string | null;
 
   // Actions
-  loadNewApartment: () => Promise<void>;
+  loadGame: () => Promise<void>;
   submitGuess: (guessedRent: number) => Promise<GuessResult | null>;
   nextRound: () => void;
   resetGame: (rounds?: number) => void;
@@ -48,7 +51,9 @@ interface GameState {
 
 export const useGameStore = create<GameState>((set, get) => ({
   // Initial state
+  rounds: [],
   currentApartment: null,
+  roundToken: null,
   currentRound: 1,
   totalRounds: 5,
   totalScore: 0,
@@ -57,18 +62,21 @@ export const useGameStore = create<GameState>((set, get) => ({
   loading: false,
   error: null,
 
-  // Load a new apartment from the backend
-  loadNewApartment: async () => {
+  // Load every round of the game from the backend in one request
+  loadGame: async () => {
     set({ loading: true, error: null });
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/apartments/random?count=1`);
-      if (!response.ok) throw new Error('Failed to fetch apartment');
+      const { totalRounds } = get();
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/rounds/new?rounds=${totalRounds}`);
+      if (!response.ok) throw new Error('Failed to fetch apartments');
 
       const data = await response.json();
-      const apartment = data.apartments[0];
 
       set({
-        currentApartment: apartment,
+        rounds: data.rounds,
+        totalRounds: data.rounds.length,
+        currentApartment: data.rounds[0] ?? null,
+        roundToken: data.round_token ?? null,
         submitted: false,
         loading: false,
       });
@@ -82,7 +90,7 @@ export const useGameStore = create<GameState>((set, get) => ({
 
   // Submit a guess and get validation
   submitGuess: async (guessedRent: number) => {
-    const { currentApartment } = get();
+    const { currentApartment, roundToken } = get();
     if (!currentApartment) return null;
 
     set({ loading: true, error: null });
@@ -93,6 +101,7 @@ export const useGameStore = create<GameState>((set, get) => ({
         body: JSON.stringify({
           apartment_id: currentApartment.id,
           guessed_rent: guessedRent,
+          round_token: roundToken,
         }),
       });
 
@@ -117,19 +126,21 @@ export const useGameStore = create<GameState>((set, get) => ({
     }
   },
 
-  // Move to next round
+  // Move to next round; its apartment was fetched with the game
   nextRound: () => {
     set((state) => ({
       currentRound: state.currentRound + 1,
+      currentApartment: state.rounds[state.currentRound] ?? null,
       submitted: false,
     }));
-    get().loadNewApartment();
   },
 
   // Reset game
   resetGame: (rounds = 5) => {
     set({
+      rounds: [],
       currentApartment: null,
+      roundToken: null,
       currentRound: 1,
       totalRounds: rounds,
       totalScore: 0,
@@ -138,7 +149,7 @@ export const useGameStore = create<GameState>((set, get) => ({
       loading: false,
       error: null,
     });
-    get().loadNewApartment();
+    get().loadGame();
   },
 
   // Clear error